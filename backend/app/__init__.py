@@ -1,32 +1,348 @@
-from flask import Flask, request, jsonify
-from services.solver import solve_sudoku
+import json
+import time
 
+from flask import Flask, Response, request, jsonify, stream_with_context
+from config import Config
+from services.batch import solve_batch, solve_stream
+from services.budget import Budget, BudgetExceeded
+from services.cache import SolutionCache
+from services.engines import COUNTERS, ENGINES, DEFAULT_ENGINE, SIZED_ENGINE
+from services.general import SIZES
+from services.generator import SYMMETRIES, generate_batch
+from services.grid import conflict_error, format_string, parse_line, parse_puzzle
+from services.metrics import Metrics
+from services.rating import rate
 
-def create_app():
+
+def select_engine(data):
+    engine = data.get('engine', DEFAULT_ENGINE)
+    if not isinstance(engine, str) or engine not in ENGINES:
+        return None
+    return engine
+
+
+def unknown_engine_error():
+    return f"Unknown engine, expected one of: {', '.join(ENGINES)}."
+
+
+def select_limits(data, config):
+    # Client-supplied timeout_ms / max_nodes, defaulting to and capped by the config.
+    timeout_ms = data.get('timeout_ms', config['SOLVE_TIMEOUT_MS'])
+    max_nodes = data.get('max_nodes', config['SOLVE_MAX_NODES'])
+
+    if timeout_ms is not None:
+        if isinstance(timeout_ms, str) and timeout_ms.isdigit():
+            timeout_ms = int(timeout_ms)
+        if type(timeout_ms) is not int or not 0 < timeout_ms <= config['SOLVE_MAX_TIMEOUT_MS']:
+            return None, f"'timeout_ms' must be an integer between 1 and {config['SOLVE_MAX_TIMEOUT_MS']}."
+
+    if max_nodes is not None:
+        if isinstance(max_nodes, str) and max_nodes.isdigit():
+            max_nodes = int(max_nodes)
+        if type(max_nodes) is not int or max_nodes <= 0:
+            return None, "'max_nodes' must be a positive integer."
+
+    return (timeout_ms, max_nodes), None
+
+
+def select_format(data):
+    # 'string' or 'grid' for the reply; None mirrors each puzzle's own form.
+    reply_format = data.get('format')
+    if reply_format not in (None, 'string', 'grid'):
+        return False, "'format' must be either 'string' or 'grid'."
+    return reply_format, None
+
+
+def reply_compact(reply_format, compact):
+    return compact if reply_format is None else reply_format == 'string'
+
+
+def solve_request(data, config, cache, metrics, cancelled=None, offload=None):
+    # The /solve contract shared by the Flask and ASGI apps. Returns (body, status).
+    # offload, when given, takes (engine, grid, budget) and runs the solves that
+    # outgrow the cache probe somewhere else; the probe always runs here.
+    if not isinstance(data, dict) or 'puzzle' not in data:
+        return {"error": "Request must contain a 'puzzle' field."}, 400
+
+    puzzle = data.get('puzzle')
+    engine = select_engine(data)
+
+    if engine is None:
+        return {"error": unknown_engine_error()}, 400
+
+    limits, error = select_limits(data, config)
+    if error:
+        return {"error": error}, 400
+
+    reply_format, error = select_format(data)
+    if error:
+        return {"error": error}, 400
+
+    puzzle, compact, error = parse_puzzle(puzzle, SIZES)
+    if error:
+        metrics.record(engine, 'invalid')
+        return {"error": error}, 400
+
+    sized = len(puzzle) != 9
+    if sized:
+        if 'engine' not in data:
+            engine = SIZED_ENGINE
+        elif engine != SIZED_ENGINE:
+            return {"error": f"Only the '{SIZED_ENGINE}' engine solves grids other than 9x9."}, 400
+        if reply_format == 'string':
+            # One character per cell only covers the digits 1-9
+            return {"error": "The 'string' format only applies to 9x9 grids."}, 400
+
+    # Contradictory givens are caught here instead of by exhausting the search
+    error, conflicts = conflict_error(puzzle)
+    if error:
+        metrics.record(engine, 'invalid')
+        return {"error": error, "conflicts": conflicts}, 400
+
+    budget = Budget(*limits, cancelled=cancelled)
+    elapsed = 0.0
+
+    def timed(engine_solve):
+        # Latency covers the engine alone, not canonicalization or cache lookups
+        def solver(grid, budget):
+            nonlocal elapsed
+            start = time.perf_counter()
+            try:
+                return engine_solve(grid, budget)
+            finally:
+                elapsed += time.perf_counter() - start
+        return solver
+
+    probe = timed(ENGINES[engine])
+    solver = probe if offload is None else timed(lambda grid, budget: offload(engine, grid, budget))
+
+    # Attempt to solve the puzzle
+    hit = False
+    try:
+        if sized:
+            # The canonical-form cache only knows 9x9 symmetries
+            solved = solver(puzzle, budget)
+        else:
+            solved, hit = cache.solve_budgeted(puzzle, solver, budget, config['SOLUTION_CACHE_PROBE_NODES'], probe)
+    except BudgetExceeded as e:
+        metrics.record(engine, 'budget_exceeded', elapsed, budget.stats())
+        return {"error": str(e), "status": "budget_exceeded"}, 408
+
+    stats = budget.stats()
+    if hit:
+        metrics.record(engine, 'cache_hit', stats=stats)
+    else:
+        metrics.record(engine, 'solved' if solved else 'unsolvable', elapsed, stats)
+
+    if solved:
+        body = {"solution": format_string(puzzle) if reply_compact(reply_format, compact) else puzzle}
+    else:
+        body = {"error": "Puzzle could not be solved."}
+    if hit:
+        # Served from an earlier solve, whatever engine and limits it used
+        body["cached"] = True
+    if data.get('stats'):
+        body["stats"] = {**stats, "wall_ms": elapsed * 1000, "engine": engine}
+    return body, 200 if solved else 422
+
+
+def create_app(config_object=Config):
     app = Flask(__name__)
+    app.config.from_object(config_object)
+    cache = SolutionCache(app.config['SOLUTION_CACHE_SIZE'])
+    metrics = Metrics()
+
+    def unknown_engine():
+        return jsonify({"error": unknown_engine_error()}), 400
 
     @app.route('/solve', methods=['POST'])
     def solve_sudoku_endpoint():
+        body, status = solve_request(request.get_json(), app.config, cache, metrics)
+        return jsonify(body), status
+
+    @app.route('/validate', methods=['POST'])
+    def validate_endpoint():
         data = request.get_json()
 
-        if not data or 'puzzle' not in data:
+        if not isinstance(data, dict) or 'puzzle' not in data:
             return jsonify({"error": "Request must contain a 'puzzle' field."}), 400
 
         puzzle = data.get('puzzle')
+        engine = data.get('engine', DEFAULT_ENGINE)
+        limit = data.get('limit', 2)
 
-        if not isinstance(puzzle, list) or len(puzzle) != 9 or not all(len(row) == 9 for row in puzzle):
-            return jsonify({"error": "Puzzle must be a 9x9 grid."}), 400
+        if not isinstance(engine, str) or engine not in COUNTERS:
+            return jsonify({"error": f"Unknown engine, expected one of: {', '.join(COUNTERS)}."}), 400
 
-        # Validate puzzle contents
-        for row in puzzle:
-            if not all(isinstance(num, int) and 0 <= num <= 9 for num in row):
-                return jsonify({"error": "Puzzle can only contain integers between 0 and 9."}), 400
+        if type(limit) is not int or not 1 <= limit <= app.config['VALIDATE_MAX_LIMIT']:
+            return jsonify({"error": f"'limit' must be an integer between 1 and {app.config['VALIDATE_MAX_LIMIT']}."}), 400
 
+        puzzle, _, error = parse_puzzle(puzzle)
+        if error:
+            return jsonify({"error": error}), 400
 
-        # Attempt to solve the puzzle
-        if solve_sudoku(puzzle):
-            return jsonify({"solution": puzzle})
-        else:
+        limits, error = select_limits(data, app.config)
+        if error:
+            return jsonify({"error": error}), 400
+
+        # Counting stops at limit, so the default uniqueness check costs about one solve
+        try:
+            solutions = COUNTERS[engine](puzzle, limit, Budget(*limits))
+        except BudgetExceeded as e:
+            return jsonify({"error": str(e), "status": "budget_exceeded"}), 408
+        return jsonify({"solutions": solutions, "unique": solutions == 1, "limit": limit})
+
+    @app.route('/generate', methods=['POST'])
+    def generate_endpoint():
+        data = request.get_json(silent=True)
+        if data is None:
+            data = {}
+        if not isinstance(data, dict):
+            return jsonify({"error": "Request body must be a JSON object."}), 400
+
+        count = data.get('count', 1)
+        clues = data.get('clues')
+        symmetry = data.get('symmetry', 'none')
+        seed = data.get('seed')
+
+        if type(count) is not int or not 1 <= count <= app.config['GENERATE_MAX_COUNT']:
+            return jsonify({"error": f"'count' must be an integer between 1 and {app.config['GENERATE_MAX_COUNT']}."}), 400
+
+        if clues is not None and (type(clues) is not int or not 17 <= clues <= 81):
+            return jsonify({"error": "'clues' must be an integer between 17 and 81."}), 400
+
+        if not isinstance(symmetry, str) or symmetry not in SYMMETRIES:
+            return jsonify({"error": f"Unknown symmetry, expected one of: {', '.join(SYMMETRIES)}."}), 400
+
+        if seed is not None and type(seed) is not int:
+            return jsonify({"error": "'seed' must be an integer."}), 400
+
+        # Clue removal stops early when no further clue can go, so 'clues' is a floor
+        puzzles = generate_batch(count, clues, symmetry, seed, workers=app.config['SOLVER_WORKERS'])
+        return jsonify({"puzzles": puzzles})
+
+    @app.route('/rate', methods=['POST'])
+    def rate_endpoint():
+        data = request.get_json()
+
+        if not isinstance(data, dict) or 'puzzle' not in data:
+            return jsonify({"error": "Request must contain a 'puzzle' field."}), 400
+
+        puzzle, _, error = parse_puzzle(data.get('puzzle'))
+        if error:
+            return jsonify({"error": error}), 400
+
+        rating = rate([num for row in puzzle for num in row])
+        if rating["hardest"] == 'invalid':
             return jsonify({"error": "Puzzle could not be solved."}), 422
+        return jsonify(rating)
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics_endpoint():
+        return Response(metrics.render(cache.stats()), mimetype='text/plain; version=0.0.4')
+
+    @app.route('/solve/cache', methods=['GET'])
+    def solve_cache_endpoint():
+        return jsonify(cache.stats())
+
+    @app.route('/solve/batch', methods=['POST'])
+    def solve_batch_endpoint():
+        data = request.get_json()
+
+        if not isinstance(data, dict) or not isinstance(data.get('puzzles'), list):
+            return jsonify({"error": "Request must contain a 'puzzles' list."}), 400
+
+        puzzles = data['puzzles']
+        engine = select_engine(data)
+
+        if engine is None:
+            return unknown_engine()
+
+        limits, error = select_limits(data, app.config)
+        if error:
+            return jsonify({"error": error}), 400
+
+        reply_format, error = select_format(data)
+        if error:
+            return jsonify({"error": error}), 400
+
+        if len(puzzles) > app.config['BATCH_MAX_PUZZLES']:
+            return jsonify({"error": f"A batch can contain at most {app.config['BATCH_MAX_PUZZLES']} puzzles."}), 413
+
+        # Validate everything up front so only well-formed grids reach the pool
+        results = [None] * len(puzzles)
+        pending, grids = [], []
+        for index, puzzle in enumerate(puzzles):
+            grid, compact, error = parse_puzzle(puzzle)
+            conflicts = None
+            if not error:
+                error, conflicts = conflict_error(grid)
+            if error:
+                results[index] = {"status": "invalid", "error": error}
+                if conflicts:
+                    results[index]["conflicts"] = conflicts
+            else:
+                pending.append((index, compact))
+                grids.append(grid)
+
+        solved = solve_batch(
+            grids,
+            engine,
+            workers=app.config['SOLVER_WORKERS'],
+            chunksize=app.config['BATCH_CHUNKSIZE'],
+            timeout_ms=limits[0],
+            max_nodes=limits[1],
+        )
+        for (index, compact), result in zip(pending, solved):
+            if 'solution' in result and reply_compact(reply_format, compact):
+                result['solution'] = format_string(result['solution'])
+            results[index] = result
+
+        return jsonify({"results": results})
+
+    @app.route('/solve/stream', methods=['POST'])
+    def solve_stream_endpoint():
+        # One puzzle per line in, one JSON result per line out, in completion order.
+        engine = select_engine(request.args)
+
+        if engine is None:
+            return unknown_engine()
+
+        limits, error = select_limits(request.args, app.config)
+        if error:
+            return jsonify({"error": error}), 400
+
+        stream = request.stream
+        max_line = app.config['STREAM_MAX_LINE']
+
+        def read_puzzles():
+            index = 0
+            for line in iter(lambda: stream.readline(max_line), b''):
+                if not line.strip():
+                    continue
+                puzzle, compact, error = parse_line(line)
+                if not error:
+                    error, _ = conflict_error(puzzle)
+                    if error:
+                        puzzle = None
+                yield (index, compact, error), puzzle
+                index += 1
+
+        def generate():
+            for (index, compact, error), result in solve_stream(
+                read_puzzles(),
+                engine,
+                workers=app.config['SOLVER_WORKERS'],
+                max_inflight=app.config['STREAM_MAX_INFLIGHT'],
+                timeout_ms=limits[0],
+                max_nodes=limits[1],
+            ):
+                if result is None:
+                    result = {"status": "invalid", "error": error}
+                elif compact and 'solution' in result:
+                    result['solution'] = format_string(result['solution'])
+                yield json.dumps({"index": index, **result}, separators=(',', ':')) + '\n'
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
     return app
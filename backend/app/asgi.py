@@ -0,0 +1,127 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from app import solve_request
+from config import Config
+from services.batch import shutdown_executor, solve_in_pool
+from services.cache import SolutionCache
+from services.metrics import Metrics
+
+
+def create_asgi_app(config_object=Config):
+    # Async serving mode for the /solve contract. Each request is handled on
+    # a thread so the event loop keeps accepting others, but those threads
+    # share the GIL: they only run the cheap part (parsing, the cache probe,
+    # canonicalization) and wait on the process pool, SOLVER_WORKERS wide,
+    # for solves that outgrow the probe. So hard puzzles queue for a worker
+    # while easy ones keep being answered. Once ASYNC_MAX_PENDING requests
+    # are in flight, new ones get a 503 with Retry-After instead of waiting.
+    # A client that disconnects cancels its solve through the budget.
+    #
+    #   uvicorn --factory app.asgi:create_asgi_app
+    config = {name: getattr(config_object, name) for name in dir(config_object) if name.isupper()}
+    cache = SolutionCache(config['SOLUTION_CACHE_SIZE'])
+    metrics = Metrics()
+    # One thread per admitted request, so none waits for a thread to come free
+    executor = ThreadPoolExecutor(config['ASYNC_MAX_PENDING'], thread_name_prefix='solver')
+    offload = partial(solve_in_pool, workers=config['SOLVER_WORKERS'])
+    pending = 0
+
+    async def send_json(send, body, status, headers=()):
+        payload = json.dumps(body, separators=(',', ':')).encode()
+        await send_body(send, payload, status, 'application/json', headers)
+
+    async def send_body(send, payload, status, content_type, headers=()):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', content_type.encode()),
+                (b'content-length', str(len(payload)).encode()),
+                *headers,
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': payload})
+
+    async def read_body(receive):
+        # Returns the request body, or None when it is too large or the client left.
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > config['ASYNC_MAX_BODY']:
+                return None
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    async def solve_endpoint(receive, send):
+        nonlocal pending
+        body = await read_body(receive)
+        if body is None:
+            return await send_json(send, {"error": "Request body is too large."}, 413)
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return await send_json(send, {"error": "Request body must be valid JSON."}, 400)
+
+        if pending >= config['ASYNC_MAX_PENDING']:
+            retry_after = str(config['ASYNC_RETRY_AFTER']).encode()
+            return await send_json(send, {"error": "Solver is busy, try again later."}, 503, [(b'retry-after', retry_after)])
+
+        cancelled = threading.Event()
+        pending += 1
+        try:
+            job = asyncio.get_running_loop().run_in_executor(
+                executor, solve_request, data, config, cache, metrics, cancelled, offload,
+            )
+            disconnect = asyncio.ensure_future(receive())
+            await asyncio.wait({job, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+            if not job.done():
+                # Only http.disconnect can arrive once the body has been read
+                cancelled.set()
+                await asyncio.wait({job})
+                return
+            disconnect.cancel()
+            response, status = job.result()
+        finally:
+            pending -= 1
+        await send_json(send, response, status)
+
+    async def lifespan(receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                executor.shutdown(wait=False, cancel_futures=True)
+                shutdown_executor()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def app(scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+
+        route = (scope['method'], scope['path'])
+        if route == ('POST', '/solve'):
+            await solve_endpoint(receive, send)
+        elif route == ('GET', '/metrics'):
+            await send_body(send, metrics.render(cache.stats()).encode(), 200, 'text/plain; version=0.0.4')
+        elif route == ('GET', '/solve/cache'):
+            await send_json(send, cache.stats(), 200)
+        elif scope['path'] in ('/solve', '/metrics', '/solve/cache'):
+            await send_json(send, {"error": "Method not allowed."}, 405)
+        else:
+            await send_json(send, {"error": "Not found."}, 404)
+
+    return app
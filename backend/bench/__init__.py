@@ -0,0 +1,229 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from services.budget import Budget, BudgetExceeded
+from services.cache import SolutionCache
+from services.engines import ENGINES
+from services.grid import parse_string
+
+CORPORA_DIR = os.path.join(os.path.dirname(__file__), 'corpora')
+
+
+def load_corpus(name):
+    # One 81-character puzzle per line; '#' lines are comments.
+    with open(os.path.join(CORPORA_DIR, name + '.txt')) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+def corpus_names():
+    return sorted(name[:-4] for name in os.listdir(CORPORA_DIR) if name.endswith('.txt'))
+
+
+def is_solution(puzzle, grid):
+    if any(given != '0' and int(given) != num for given, num in zip(puzzle, (num for row in grid for num in row))):
+        return False
+    rows = [set(row) for row in grid]
+    cols = [set(col) for col in zip(*grid)]
+    boxes = [
+        {grid[row][col] for row in range(top, top + 3) for col in range(left, left + 3)}
+        for top in range(0, 9, 3)
+        for left in range(0, 9, 3)
+    ]
+    digits = set(range(1, 10))
+    return all(unit == digits for unit in rows + cols + boxes)
+
+
+def run_puzzle(solver, puzzle, timeout_ms, cache=None, probe_nodes=0):
+    grid, _ = parse_string(puzzle)
+    budget = Budget(timeout_ms)
+    start = time.perf_counter()
+    try:
+        if cache is None:
+            solved = solver(grid, budget)
+        else:
+            solved, _ = cache.solve_budgeted(grid, solver, budget, probe_nodes)
+        outcome = 'solved' if solved else 'unsolvable'
+    except BudgetExceeded:
+        outcome = 'timeout'
+    elapsed = time.perf_counter() - start
+    correct = outcome == 'solved' and is_solution(puzzle, grid)
+    return outcome, correct, elapsed, budget.stats()
+
+
+def shuffled(puzzle, rng):
+    # An equivalent puzzle under relabeling, transposition and band/row swaps,
+    # which only the canonical-form cache can recognise.
+    labels = [0] + rng.sample(range(1, 10), 9)
+    bands = rng.sample(range(3), 3)
+    rows = [band * 3 + row for band in bands for row in rng.sample(range(3), 3)]
+    transpose = rng.random() < 0.5
+    out = []
+    for row in rows:
+        for col in range(9):
+            cell = col * 9 + row if transpose else row * 9 + col
+            out.append(str(labels[int(puzzle[cell])]))
+    return ''.join(out)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def peak_memory(solver, puzzles, timeout_ms):
+    # Separate pass, since tracing allocations slows the solvers down.
+    tracemalloc.start()
+    try:
+        for puzzle in puzzles:
+            run_puzzle(solver, puzzle, timeout_ms)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench(engine, corpus, puzzles, timeout_ms, repeat=1, memory=True, cache=None, probe_nodes=0, label=None):
+    solver = ENGINES[engine]
+    expect_solved = corpus.split('~')[0] != 'invalid'
+    latencies = []
+    totals = {"nodes": 0, "backtracks": 0, "propagations": 0}
+    counts = {'solved': 0, 'unsolvable': 0, 'timeout': 0}
+    correct = 0
+
+    for _ in range(repeat):
+        for puzzle in puzzles:
+            outcome, ok, elapsed, stats = run_puzzle(solver, puzzle, timeout_ms, cache, probe_nodes)
+            counts[outcome] += 1
+            correct += ok if expect_solved else outcome == 'unsolvable'
+            latencies.append(elapsed)
+            for name in totals:
+                totals[name] += stats[name]
+
+    total = sum(latencies)
+    return {
+        "engine": label or engine,
+        "corpus": corpus,
+        "puzzles": len(latencies),
+        **counts,
+        "correct": correct,
+        "seconds": total,
+        "puzzles_per_sec": len(latencies) / total if total else None,
+        **totals,
+        "nodes_per_sec": totals["nodes"] / total if total else None,
+        "latency_ms": {
+            "mean": statistics.mean(latencies) * 1000,
+            "p50": percentile(latencies, 0.50) * 1000,
+            "p90": percentile(latencies, 0.90) * 1000,
+            "p99": percentile(latencies, 0.99) * 1000,
+            "max": max(latencies) * 1000,
+        },
+        "peak_memory_bytes": peak_memory(solver, puzzles, timeout_ms) if memory and cache is None else None,
+    }
+
+
+def bench_cache(engine, corpus, puzzles, timeout_ms, probe_nodes):
+    # The /solve path through the solution cache: a cold pass over the corpus,
+    # then a warm pass over shuffled copies of it that only canonical hits serve.
+    cache = SolutionCache()
+    label = f"{engine}+cache"
+    rng = random.Random(0)
+    copies = [shuffled(puzzle, rng) for puzzle in puzzles]
+    return [
+        bench(engine, corpus, puzzles, timeout_ms, cache=cache, probe_nodes=probe_nodes, label=label),
+        bench(engine, corpus + '~warm', copies, timeout_ms, cache=cache, probe_nodes=probe_nodes, label=label),
+    ]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(__file__),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results, baseline=None):
+    previous = {(row["engine"], row["corpus"]): row for row in (baseline or {}).get("results", [])}
+    # Column widths follow the longest label, e.g. 'backtracking+cache' or 'minimal17~warm'
+    engine_width = max([len('engine'), *(len(row['engine']) for row in results)]) + 2
+    corpus_width = max([len('corpus'), *(len(row['corpus']) for row in results)]) + 2
+    header = f"{'engine':<{engine_width}}{'corpus':<{corpus_width}}{'ok':>8}{'timeout':>8}{'puz/s':>11}{'nodes/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'peak KiB':>10}"
+    if baseline:
+        header += f"{'vs base':>9}"
+    print(header)
+    for row in results:
+        line = (
+            f"{row['engine']:<{engine_width}}{row['corpus']:<{corpus_width}}"
+            f"{row['correct']:>4}/{row['puzzles']:<3}{row['timeout']:>8}"
+            f"{row['puzzles_per_sec'] or 0:>11.1f}{row['nodes_per_sec'] or 0:>12.0f}"
+            f"{row['latency_ms']['p50']:>10.2f}{row['latency_ms']['p99']:>10.2f}"
+            f"{(row['peak_memory_bytes'] or 0) / 1024:>10.1f}"
+        )
+        old = previous.get((row["engine"], row["corpus"]))
+        if baseline and old and old["puzzles_per_sec"] and row["puzzles_per_sec"]:
+            line += f"{row['puzzles_per_sec'] / old['puzzles_per_sec']:>8.2f}x"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench', description="Benchmark the solver engines on the bundled corpora.")
+    parser.add_argument('--engines', default=','.join(ENGINES), help="comma-separated engine names")
+    parser.add_argument('--corpora', default=','.join(corpus_names()), help="comma-separated corpus names")
+    parser.add_argument('--timeout-ms', type=int, default=2000, help="per-puzzle time budget")
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--no-memory', action='store_true', help="skip the peak-memory pass")
+    parser.add_argument('--cache', action='store_true', help="also run each engine through the solution cache, cold and warm")
+    parser.add_argument('--probe-nodes', type=int, default=256, help="node budget of the direct solve tried before the cache")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--compare', help="JSON results of an earlier run to compare throughput against")
+    args = parser.parse_args(argv)
+
+    engines = args.engines.split(',')
+    unknown = [engine for engine in engines if engine not in ENGINES]
+    if unknown:
+        parser.error(f"unknown engine(s): {', '.join(unknown)}")
+
+    results = []
+    for corpus in args.corpora.split(','):
+        puzzles = load_corpus(corpus)
+        for engine in engines:
+            results.append(bench(engine, corpus, puzzles, args.timeout_ms, args.repeat, not args.no_memory))
+            if args.cache:
+                results.extend(bench_cache(engine, corpus, puzzles, args.timeout_ms, args.probe_nodes))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timeout_ms": args.timeout_ms,
+            "repeat": args.repeat,
+            "probe_nodes": args.probe_nodes if args.cache else None,
+        },
+        "results": results,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
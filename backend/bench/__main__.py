@@ -0,0 +1,5 @@
+import sys
+
+from bench import main
+
+main(sys.argv[1:])
@@ -1,12 +1,32 @@
+import os
+
+
 class Config:
     DEBUG = False
     TESTING = False
+    SOLVER_WORKERS = os.cpu_count() or 1
+    BATCH_MAX_PUZZLES = 10000
+    BATCH_CHUNKSIZE = 16
+    STREAM_MAX_INFLIGHT = 64
+    STREAM_MAX_LINE = 4096
+    SOLUTION_CACHE_SIZE = 4096
+    SOLUTION_CACHE_PROBE_NODES = 256
+    SOLVE_TIMEOUT_MS = 5000
+    SOLVE_MAX_TIMEOUT_MS = 30000
+    SOLVE_MAX_NODES = None
+    VALIDATE_MAX_LIMIT = 1000
+    GENERATE_MAX_COUNT = 1000
+    ASYNC_MAX_PENDING = 64
+    ASYNC_RETRY_AFTER = 1
+    ASYNC_MAX_BODY = 65536
 
 class DevelopmentConfig(Config):
     DEBUG = True
 
 class TestingConfig(Config):
     TESTING = True
+    SOLVER_WORKERS = 2
+    ASYNC_MAX_PENDING = 4
 
 class ProductionConfig(Config):
     DEBUG = False
@@ -1,63 +1,123 @@
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-from werkzeug.utils import secure_filename
-from solver import solve_sudoku
-import cv2
-import numpy as np
-from torchvision import transforms
-from io import BytesIO
-from PIL import Image
-import os
-from ml import Net
-import torch
-
-app = Flask(__name__)
-CORS(app)
-model_path = "sudoku_vision_cnn.pth"
-model = Net()
-model.load_state_dict(torch.load(model_path))
-model.eval()
-
-transform = transforms.Compose([
-    transforms.Resize((640, 480)),
-    transforms.ToTensor()
-])
-
-def process_image(image):
-    image = Image.open(BytesIO(image)).convert('L')
-    image = transform(image)
-    image = image.unsqueeze(0)
-    return image
-
-def predict(image):
-    with torch.no_grad():
-        output = model(image)
-        output = output.squeeze(0).argmax(dim=1).view(9, 9)
-    return output.numpy()
-
-@app.route('/solve-image', methods=['POST'])
-def solve_from_image():
-    if 'image' not in request.files:
-        return jsonify({"error": "Aucun fichier."}), 400
-    file = request.files['image']
-    if file.filename == '':
-        return jsonify({"error": "Aucun fichier selectioné."}), 400
-    image = process_image(file.read())
-    grid = predict(image)
-
-    if solve_sudoku(grid):
-        return jsonify({"solution": grid.tolist()}), 200
-    else:
-        return jsonify({"solution": grid.tolist()}), 200
-
-@app.route('/solve', methods=['POST'])
-def solve():
-    data = request.get_json()
-    board = data.get('board')
-    if board and solve_sudoku(board):
-        return jsonify({"solution": board}), 200
-    else:
-        return jsonify({"error": "Pas de solution."}), 400
-
-if __name__ == '__main__':
-    app.run(debug=True)
+from flask import Flask, request, jsonify
+from flask_cors import CORS
+from werkzeug.utils import secure_filename
+from solver import solve_sudoku
+from batcher import MicroBatcher
+from image_cache import RecognitionCache, content_hash, perceptual_hash
+from vision import binarize, find_grid, inked_cells, load_classifier, warp_grid
+import cv2
+import numpy as np
+
+app = Flask(__name__)
+CORS(app)
+model_path = "digits.pth"  # DigitNet weights, written by train_digits.py
+classify = load_classifier(model_path)
+
+MAX_IMAGES = 32
+
+def process_image(image):
+    # Decoded to grayscale and the grid warped flat, or None when the upload
+    # isn't an image or shows no grid
+    image = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        return None
+    corners = find_grid(image)
+    if corners is None:
+        return None
+    return warp_grid(image, corners)
+
+def predict_batch(warps):
+    # One forward pass for the inked cells of every grid the batcher grouped together
+    cells = [inked_cells(binarize(warped)) for warped in warps]
+    batch = np.concatenate([patches for _, patches in cells])
+    digits = classify(batch) if len(batch) else []
+    grids, start = [], 0
+    for inked, patches in cells:
+        grid = np.zeros((9, 9), dtype=np.uint8)
+        grid[inked] = digits[start:start + len(patches)]
+        start += len(patches)
+        grids.append(grid)
+    return grids
+
+batcher = MicroBatcher(predict_batch, max_batch=MAX_IMAGES, max_wait_ms=10)
+cache = RecognitionCache(maxsize=1024)
+
+def solve_grid(grid):
+    grid = grid.tolist()
+    solution = [row[:] for row in grid]
+    if solve_sudoku(solution):
+        return {"grid": grid, "solution": solution}
+    return {"grid": grid, "error": "Pas de solution."}
+
+def recognize(uploads):
+    # Grid and solution for every upload, None when it can't be decoded. Byte-identical
+    # uploads skip decoding, re-encoded photos of a known grid skip inference; the rest share forward passes.
+    entries = [None] * len(uploads)
+    pending = []
+    for index, data in enumerate(uploads):
+        digest = content_hash(data)
+        entry = cache.get(digest)
+        if entry is None:
+            image = process_image(data)
+            if image is None:
+                continue
+            phash = perceptual_hash(image)
+            entry = cache.get_image(phash, digest)
+            if entry is None:
+                pending.append((index, digest, phash, image))
+                continue
+        entries[index] = entry
+
+    grids = batcher.map([image for _, _, _, image in pending])
+    for (index, digest, phash, _), grid in zip(pending, grids):
+        entry = solve_grid(grid)
+        cache.put(digest, phash, entry)
+        entries[index] = entry
+    return entries
+
+@app.route('/solve-image', methods=['POST'])
+def solve_from_image():
+    if 'image' not in request.files:
+        return jsonify({"error": "Aucun fichier."}), 400
+    file = request.files['image']
+    if file.filename == '':
+        return jsonify({"error": "Aucun fichier selectioné."}), 400
+    entry = recognize([file.read()])[0]
+    if entry is None:
+        return jsonify({"error": "Image illisible."}), 400
+
+    return jsonify({"solution": entry.get("solution", entry["grid"])}), 200
+
+@app.route('/solve-images', methods=['POST'])
+def solve_from_images():
+    files = [file for file in request.files.getlist('images') if file.filename]
+    if not files:
+        return jsonify({"error": "Aucun fichier."}), 400
+    if len(files) > MAX_IMAGES:
+        return jsonify({"error": f"{MAX_IMAGES} images maximum par requête."}), 413
+
+    results = []
+    for file, entry in zip(files, recognize([file.read() for file in files])):
+        result = {"filename": secure_filename(file.filename)}
+        if entry is None:
+            result["error"] = "Image illisible."
+        else:
+            result.update(entry)
+        results.append(result)
+    return jsonify({"results": results}), 200
+
+@app.route('/cache', methods=['GET'])
+def cache_stats():
+    return jsonify(cache.stats()), 200
+
+@app.route('/solve', methods=['POST'])
+def solve():
+    data = request.get_json()
+    board = data.get('board')
+    if board and solve_sudoku(board):
+        return jsonify({"solution": board}), 200
+    else:
+        return jsonify({"error": "Pas de solution."}), 400
+
+if __name__ == '__main__':
+    app.run(debug=True, threaded=True)
@@ -0,0 +1,61 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Groups items submitted from concurrent requests into single calls of
+    fn(list_of_items) -> list_of_results. A batch is sent as soon as it holds
+    max_batch items, or max_wait_ms after its first item arrived, so a lone
+    request never waits longer than that for company.
+    """
+
+    def __init__(self, fn, max_batch=32, max_wait_ms=10):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = queue.Queue()
+        self.worker = threading.Thread(target=self.run, name='micro-batcher', daemon=True)
+        self.worker.start()
+
+    def submit(self, item):
+        """
+        Queue one item; the returned Future resolves to its result.
+        """
+        future = Future()
+        self.queue.put((item, future))
+        return future
+
+    def map(self, items):
+        """
+        Submit several items at once and wait for all of their results.
+        """
+        futures = [self.submit(item) for item in items]
+        return [future.result() for future in futures]
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            items = [item for item, _ in batch]
+            try:
+                results = list(self.fn(items))
+                if len(results) != len(items):
+                    raise ValueError(f'Batch function returned {len(results)} results for {len(items)} items.')
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
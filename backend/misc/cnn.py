@@ -1,36 +1,32 @@
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import Dataset, DataLoader
+from torch.utils.data import BatchSampler, DataLoader, RandomSampler, SequentialSampler
 import torch.nn.functional as F
-import pandas as pd
-from sklearn.model_selection import train_test_split
 import os
 from tqdm import tqdm
-tqdm.pandas()
 import numpy as np
+from dataset import MemmapSudokuDataset
 
-class SudokuDataset(Dataset):
-    def __init__(self, csv_file):
-        print('Loading dataset...')
-        skip = range(1, 1500001) # Value not updated for next run
-        self.data_frame = pd.read_csv(csv_file, skiprows=skip, nrows=100000, dtype=str)
-        self.data_frame['puzzle'] = [list(map(int, list(row))) for row in tqdm(self.data_frame['puzzle'], desc="Loading puzzles")]
-        self.data_frame['solution'] = [list(map(int, list(row))) for row in tqdm(self.data_frame['solution'], desc="Loading solutions")]
 
-    def __len__(self):
-        return len(self.data_frame)
+def batch_loader(dataset, batch_size, shuffle):
+    # Each batch is gathered from the memory-mapped arrays in one indexing call
+    sampler = RandomSampler(dataset) if shuffle else SequentialSampler(dataset)
+    return DataLoader(dataset, batch_size=None, sampler=BatchSampler(sampler, batch_size, drop_last=False), num_workers=11)
 
-    def __getitem__(self, idx):
-        puzzle_str, solution_str = self.data_frame.iloc[idx]
-        puzzle = torch.tensor([int(i) for i in puzzle_str], dtype=torch.float32).view(1, 9, 9)
-        solution = torch.tensor([int(i) for i in solution_str], dtype=torch.long).view(9, 9) - 1
-        return puzzle, solution
 
-dataset = SudokuDataset('./data/sudoku.csv')
-train_set, val_set = train_test_split(dataset, test_size=0.1, random_state=42)
-train_loader = DataLoader(train_set, batch_size=128, shuffle=True, num_workers=11)
-val_loader = DataLoader(val_set, batch_size=128, shuffle=False, num_workers=11)
+def select_device(device=None):
+    # An explicit device wins; otherwise CUDA when present, else the CPU
+    if device is not None:
+        return torch.device(device)
+    return torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+
+
+def to_device(puzzles, solutions, device):
+    # uint8 digit batches -> model input (N, 1, 9, 9) floats and (N, 9, 9) class targets
+    puzzles = puzzles.to(device, non_blocking=True).float().view(-1, 1, 9, 9)
+    solutions = solutions.to(device, non_blocking=True).long().view(-1, 9, 9) - 1
+    return puzzles, solutions
 
 
 class CNN(nn.Module):
@@ -54,10 +50,9 @@ class CNN(nn.Module):
         x = self.fc1(x)
         return x.view(-1, 81, 9)
 
-model = CNN().cuda()
-
 
 def train(model, train_loader, val_loader, epochs=10, patience=3):
+    device = next(model.parameters()).device
     criterion = nn.CrossEntropyLoss()
     optimizer = optim.Adam(model.parameters(), weight_decay=1e-5)
     scheduler = optim.lr_scheduler.ReduceLROnPlateau(optimizer, 'min', patience=2, factor=0.5, min_lr=1e-6, verbose=True)
@@ -66,7 +61,7 @@ def train(model, train_loader, val_loader, epochs=10, patience=3):
     best_loss = np.inf
 
     if os.path.exists(model_path):
-        model.load_state_dict(torch.load(model_path))
+        model.load_state_dict(torch.load(model_path, map_location=device))
         model.eval()
         print('Loaded existing model.')
 
@@ -75,8 +70,7 @@ def train(model, train_loader, val_loader, epochs=10, patience=3):
         running_loss = 0.0
         progress_bar = tqdm(enumerate(train_loader), total=len(train_loader), desc=f"Epoch {epoch+1}")
         for i, (puzzles, solutions) in progress_bar:
-            puzzles = puzzles.cuda()
-            solutions = solutions.cuda()
+            puzzles, solutions = to_device(puzzles, solutions, device)
             optimizer.zero_grad()
             outputs = model(puzzles)
             loss = criterion(outputs.view(-1, 9), solutions.view(-1))
@@ -87,7 +81,7 @@ def train(model, train_loader, val_loader, epochs=10, patience=3):
             progress_bar.set_description(f"Epoch {epoch+1}, Loss: {running_loss / (i + 1)}")
 
         avg_train_loss = running_loss / len(train_loader.dataset)
-        val_loss = validate(model, val_loader, criterion)
+        val_loss = validate(model, val_loader, criterion, device)
         print(f'Epoch {epoch + 1}, Train Loss: {avg_train_loss:.4f}, Validation Loss: {val_loss:.4f}')
         scheduler.step(val_loss)
 
@@ -104,13 +98,12 @@ def train(model, train_loader, val_loader, epochs=10, patience=3):
             print('Early stopping!')
             break
 
-def validate(model, val_loader, criterion):
+def validate(model, val_loader, criterion, device):
     model.eval()
     val_loss = 0.0
     with torch.no_grad():
         for puzzles, solutions in val_loader:
-            puzzles = puzzles.cuda()
-            solutions = solutions.cuda()
+            puzzles, solutions = to_device(puzzles, solutions, device)
             outputs = model(puzzles)
             loss = criterion(outputs.view(-1, 9), solutions.view(-1))
             val_loss += loss.item() * puzzles.size(0)
@@ -118,4 +111,11 @@ def validate(model, val_loader, criterion):
     return val_loss / len(val_loader.dataset)
 
 if __name__ == "__main__":
-    train(model, train_loader, val_loader, epochs=10000)
\ No newline at end of file
+    # Expects the arrays written once by `python dataset.py ./data/sudoku.csv ./data/sudoku`
+    dataset = MemmapSudokuDataset('./data/sudoku')
+    train_set, val_set = dataset.split(0.1)
+    train_loader = batch_loader(train_set, 128, shuffle=True)
+    val_loader = batch_loader(val_set, 128, shuffle=False)
+
+    model = CNN().to(select_device())
+    train(model, train_loader, val_loader, epochs=10000)
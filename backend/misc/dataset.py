@@ -0,0 +1,210 @@
+import argparse
+import math
+import os
+
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+
+PUZZLES_FILE = 'puzzles.npy'
+SOLUTIONS_FILE = 'solutions.npy'
+
+
+def count_rows(csv_file):
+    """
+    Count the data rows of a CSV file: every non-blank line but the header,
+    the same lines convert() writes out.
+    """
+    with open(csv_file, 'rb') as f:
+        f.readline()
+        return sum(1 for line in f if line.strip())
+
+
+def convert(csv_file, out_dir, block_rows=1 << 16):
+    """
+    One-time conversion of the puzzle/solution CSV into two packed (N, 81)
+    uint8 .npy files holding the digits 0-9. The CSV is streamed in blocks,
+    so memory stays flat however many rows it has.
+    """
+    rows = count_rows(csv_file)
+    os.makedirs(out_dir, exist_ok=True)
+    puzzles = np.lib.format.open_memmap(os.path.join(out_dir, PUZZLES_FILE), mode='w+', dtype=np.uint8, shape=(rows, 81))
+    solutions = np.lib.format.open_memmap(os.path.join(out_dir, SOLUTIONS_FILE), mode='w+', dtype=np.uint8, shape=(rows, 81))
+
+    with open(csv_file, 'rb') as f:
+        header = f.readline().decode().strip().split(',')
+        puzzle_col, solution_col = header.index('puzzle'), header.index('solution')
+
+        start = 0
+        while start < rows:
+            lines = [line for line in (f.readline() for _ in range(block_rows)) if line.strip()]
+            if not lines:
+                break
+            fields = [line.rstrip(b'\r\n').split(b',') for line in lines]
+            stop = start + len(fields)
+            puzzles[start:stop] = to_digits(b''.join(row[puzzle_col] for row in fields))
+            solutions[start:stop] = to_digits(b''.join(row[solution_col] for row in fields))
+            start = stop
+
+    puzzles.flush()
+    solutions.flush()
+    return start
+
+
+def to_digits(text):
+    """
+    Concatenated 81-character puzzles ('0' or '.' for blanks) as an (N, 81) uint8 array.
+    """
+    digits = np.frombuffer(text.replace(b'.', b'0'), dtype=np.uint8).reshape(-1, 81) - 48
+    if digits.max(initial=0) > 9:
+        raise ValueError('Puzzles can only contain digits and dots.')
+    return digits
+
+
+class ShuffledRows:
+    """
+    Positions start:stop of a seeded shuffle of the row range base, computed
+    as the bijection i -> base[(step * i + offset) % len(base)] with step
+    coprime to len(base). Indexes like an array of row numbers but pickles
+    as a few ints, where a materialized permutation of 9M rows would be
+    72 MB per DataLoader worker.
+    """
+
+    def __init__(self, base, seed):
+        rng = np.random.default_rng(seed)
+        total = len(base)
+        step = 1
+        if total > 1:
+            step = int(rng.integers(1, total))
+            while math.gcd(step, total) != 1:
+                step = int(rng.integers(1, total))
+        self.base, self.step, self.offset = base, step, int(rng.integers(0, max(total, 1)))
+        self.positions = range(total)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, idx):
+        total = len(self.base)
+        if isinstance(idx, slice):
+            rows = ShuffledRows.__new__(ShuffledRows)
+            rows.base, rows.step, rows.offset = self.base, self.step, self.offset
+            rows.positions = self.positions[idx]
+            return rows
+        if isinstance(idx, (int, np.integer)):
+            return self.base[(self.step * self.positions[idx] + self.offset) % total]
+        idx = np.asarray(idx)
+        size = len(self.positions)
+        if ((idx < -size) | (idx >= size)).any():
+            raise IndexError(f'index out of range for {size} rows')
+        positions = self.positions.start + self.positions.step * (idx % size)
+        return self.base.start + self.base.step * ((self.step * positions + self.offset) % total)
+
+
+class MemmapSudokuDataset(Dataset):
+    """
+    Puzzles and solutions memory-mapped from the arrays written by convert().
+    rows selects any subset of the file (a range, a slice or an index array),
+    so train/validation splits never copy data. Items are uint8 tensors of
+    81 digits: an int or a slice views the mapped pages, while an index
+    list (what BatchSampler hands over) gathers its rows into a fresh array,
+    one copy per batch. Convert them on the device with .float() / .long() - 1.
+
+    Only data_dir and rows are pickled: DataLoader workers started with
+    spawn (Windows, macOS) map the files themselves on first access instead
+    of receiving a copy of the arrays.
+    """
+
+    def __init__(self, data_dir, rows=None):
+        self.data_dir = data_dir
+        self._maps = None
+        total = len(self.puzzles)
+        if rows is None:
+            rows = range(total)
+        elif isinstance(rows, slice):
+            rows = range(*rows.indices(total))
+        elif not isinstance(rows, range):
+            rows = np.asarray(rows)
+        self.rows = rows
+
+    @property
+    def puzzles(self):
+        return self._mapped()[0]
+
+    @property
+    def solutions(self):
+        return self._mapped()[1]
+
+    def _mapped(self):
+        # Copy-on-write mapping: writable as far as torch.from_numpy is
+        # concerned, while the files on disk are never modified.
+        if self._maps is None:
+            self._maps = (
+                np.load(os.path.join(self.data_dir, PUZZLES_FILE), mmap_mode='c'),
+                np.load(os.path.join(self.data_dir, SOLUTIONS_FILE), mmap_mode='c'),
+            )
+        return self._maps
+
+    def __getstate__(self):
+        # Pickling a memmap writes out its whole contents; each process maps its own
+        state = self.__dict__.copy()
+        state['_maps'] = None
+        return state
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, idx):
+        # An int gives one (puzzle, solution) pair; a slice or an index list a
+        # whole batch. Ints and slices stay views of the mapped file, index
+        # lists are copied out of it.
+        rows = self.select(idx)
+        if isinstance(rows, range):
+            rows = slice(rows.start, rows.stop, rows.step)
+        elif isinstance(rows, ShuffledRows):
+            rows = rows[np.arange(len(rows))]
+        return torch.from_numpy(self.puzzles[rows]), torch.from_numpy(self.solutions[rows])
+
+    def select(self, idx):
+        if isinstance(idx, (int, np.integer, slice)) or not isinstance(self.rows, range):
+            return self.rows[idx]
+        # Index lists over a range map arithmetically, without materializing it
+        idx = np.asarray(idx)
+        size = len(self.rows)
+        if ((idx < -size) | (idx >= size)).any():
+            raise IndexError(f'index out of range for {size} rows')
+        return self.rows.start + self.rows.step * (idx % size)
+
+    def subset(self, idx):
+        """
+        A dataset over the given rows of this one, sharing the same mapping.
+        """
+        subset = MemmapSudokuDataset.__new__(MemmapSudokuDataset)
+        subset.data_dir, subset._maps = self.data_dir, self._maps
+        subset.rows = self.select(idx)
+        return subset
+
+    def split(self, fraction, seed=42):
+        """
+        Split into two datasets over a seeded shuffle of the rows, the second
+        one holding roughly fraction of them, like the train_test_split(...,
+        random_state=42) it replaces: any ordering in the CSV is spread over
+        both sides instead of ending up in the validation set.
+        """
+        shuffled = MemmapSudokuDataset.__new__(MemmapSudokuDataset)
+        shuffled.data_dir, shuffled._maps = self.data_dir, self._maps
+        if isinstance(self.rows, range):
+            shuffled.rows = ShuffledRows(self.rows, seed)
+        else:
+            shuffled.rows = self.rows[np.random.default_rng(seed).permutation(len(self.rows))]
+        cut = len(self) - int(len(self) * fraction)
+        return shuffled.subset(slice(0, cut)), shuffled.subset(slice(cut, len(self)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert the puzzle/solution CSV into memory-mappable uint8 arrays.')
+    parser.add_argument('csv_file', nargs='?', default='./data/sudoku.csv')
+    parser.add_argument('out_dir', nargs='?', default='./data/sudoku')
+    args = parser.parse_args()
+
+    print(f'Converted {convert(args.csv_file, args.out_dir)} rows into {args.out_dir}')
@@ -0,0 +1,124 @@
+import argparse
+import time
+
+import numpy as np
+
+import hybrid
+from inference import Predictor, to_batch
+
+
+def legal_moves(batch):
+    """
+    (N, 81, 9) booleans: digit d may go in cell c, i.e. c is blank and no
+    row, column or box peer already holds d.
+    """
+    grids = batch.reshape(-1, 9, 9)
+    onehot = grids[..., None] == np.arange(1, 10, dtype=np.uint8)  # (N, 9, 9, 9)
+    rows = onehot.any(axis=2)
+    cols = onehot.any(axis=1)
+    boxes = onehot.reshape(-1, 3, 3, 3, 3, 9).any(axis=(2, 4))
+    used = rows[:, :, None, :] | cols[:, None, :, :] | np.repeat(np.repeat(boxes, 3, axis=1), 3, axis=2)
+    return (~used & (grids == 0)[..., None]).reshape(-1, 81, 9)
+
+
+def decode(predictor, puzzles):
+    """
+    Iterative decoding of a whole batch: at each step every unfinished
+    puzzle gets its single most confident legal (cell, digit) filled in,
+    then only those puzzles go through the network again. A puzzle stops
+    when it is full or when a blank has no legal digit left.
+
+    Returns (grids (N, 81) uint8, complete (N,) bool, passes (N,) int), passes
+    counting the forward passes each puzzle took part in.
+    """
+    grids = to_batch(puzzles).copy()
+    complete = np.zeros(len(grids), dtype=bool)
+    passes = np.zeros(len(grids), dtype=np.int32)
+    active = np.flatnonzero((grids == 0).any(axis=1))
+    complete[(grids > 0).all(axis=1)] = True
+
+    while len(active):
+        probabilities = predictor.probabilities(grids[active])
+        passes[active] += 1
+
+        legal = legal_moves(grids[active])
+        scores = np.where(legal, probabilities, -1.0).reshape(len(active), -1)
+        moves = scores.argmax(axis=1)
+        stuck = scores[np.arange(len(active)), moves] < 0
+        blocked = ((grids[active] == 0) & ~legal.any(axis=2)).any(axis=1)
+
+        go = ~stuck & ~blocked
+        rows = active[go]
+        cells, digits = np.divmod(moves[go], 9)
+        grids[rows, cells] = digits + 1
+
+        full = (grids[rows] > 0).all(axis=1)
+        complete[rows[full]] = True
+        active = rows[~full]
+
+    return grids, complete, passes
+
+
+def evaluate(predictor, puzzles, solutions=None):
+    """
+    Decode a batch and summarise it: how many puzzles came out complete (and
+    matching the reference solutions when given), cell accuracy over the
+    blanks, forward passes per puzzle and throughput. The plain exact search
+    from hybrid.py runs on the same puzzles for comparison.
+    """
+    batch = to_batch(puzzles)
+    start = time.perf_counter()
+    grids, complete, passes = decode(predictor, batch)
+    elapsed = time.perf_counter() - start
+
+    report = {
+        'puzzles': len(batch),
+        'complete': int(complete.sum()),
+        'passes_per_puzzle': float(passes.mean()) if len(batch) else 0.0,
+        'decoder_puzzles_per_s': len(batch) / elapsed if elapsed else 0.0,
+    }
+    if solutions is not None:
+        expected = to_batch(solutions)
+        blanks = batch == 0
+        report['correct'] = int(((grids == expected).all(axis=1)).sum())
+        report['cell_accuracy'] = float((grids == expected)[blanks].mean()) if blanks.any() else 1.0
+
+    start = time.perf_counter()
+    hybrid.solve_batch(batch)
+    elapsed = time.perf_counter() - start
+    report['search_puzzles_per_s'] = len(batch) / elapsed if elapsed else 0.0
+    return report
+
+
+def read_csv(path, limit=None):
+    """
+    Puzzles and, when present, solutions from a 'puzzle,solution' CSV or a plain puzzle list.
+    """
+    puzzles, solutions = [], []
+    with open(path) as f:
+        for line in f:
+            fields = line.strip().split(',')
+            if len(fields[0]) != 81 or line.startswith('#'):
+                continue
+            puzzles.append(fields[0])
+            if len(fields) > 1 and len(fields[1]) == 81:
+                solutions.append(fields[1])
+            if limit and len(puzzles) >= limit:
+                break
+    return puzzles, (solutions if len(solutions) == len(puzzles) else None)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Iterative CNN decoding versus exact search.')
+    parser.add_argument('path')
+    parser.add_argument('--model', default='sudoku.pth')
+    parser.add_argument('--limit', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=512)
+    parser.add_argument('--device', default=None)
+    parser.add_argument('--threads', type=int, default=None)
+    args = parser.parse_args()
+
+    predictor = Predictor(args.model, device=args.device, batch_size=args.batch_size, threads=args.threads)
+    puzzles, solutions = read_csv(args.path, args.limit)
+    for name, value in evaluate(predictor, puzzles, solutions).items():
+        print(f'{name:<24} {value:.4f}' if isinstance(value, float) else f'{name:<24} {value}')
@@ -0,0 +1,176 @@
+import argparse
+import time
+
+import numpy as np
+
+from inference import Predictor, to_batch
+
+ALL = 0x1FF
+POPCOUNT = [bin(mask).count('1') for mask in range(512)]
+UNITS = (
+    [[row * 9 + col for col in range(9)] for row in range(9)]
+    + [[row * 9 + col for row in range(9)] for col in range(9)]
+    + [[(box // 3 * 3 + row) * 9 + box % 3 * 3 + col for row in range(3) for col in range(3)] for box in range(9)]
+)
+PEERS = [sorted({peer for unit in UNITS if cell in unit for peer in unit} - {cell}) for cell in range(81)]
+
+# Digit order and per-digit confidence used by the plain search: 1 to 9, no preference.
+PLAIN_ORDER = [[1 << digit for digit in range(9)]] * 81
+PLAIN_SCORES = [[1.0] * 9] * 81
+
+
+def propagate(cand, queue):
+    """
+    Naked singles: strike every fixed cell's digit from its peers. Returns False on a contradiction.
+    """
+    while queue:
+        cell = queue.pop()
+        bit = cand[cell]
+        for peer in PEERS[cell]:
+            mask = cand[peer]
+            if mask & bit:
+                mask ^= bit
+                if not mask:
+                    return False
+                cand[peer] = mask
+                if not mask & (mask - 1):
+                    queue.append(peer)
+    return True
+
+
+def choose_cell(cand, order, scores):
+    """
+    Fewest candidates first; among those, the cell whose most likely
+    remaining digit the network is most confident about.
+    """
+    best, best_key = -1, None
+    for cell in range(81):
+        mask = cand[cell]
+        if not mask & (mask - 1):
+            continue
+        top = next(bit for bit in order[cell] if mask & bit)
+        key = (POPCOUNT[mask], -scores[cell][top.bit_length() - 1])
+        if best_key is None or key < best_key:
+            best, best_key = cell, key
+    return best
+
+
+def search(cand, queue, order, scores, stats):
+    """
+    Exact depth-first search over candidate masks. Digits are tried in the
+    order given per cell, so the network only steers the search: every
+    solution it returns is checked by propagation like any other.
+    """
+    stats['nodes'] += 1
+    if not propagate(cand, queue):
+        return None
+
+    best = choose_cell(cand, order, scores)
+    if best < 0:
+        return cand
+
+    mask = cand[best]
+    for bit in order[best]:
+        if not mask & bit:
+            continue
+        trial = cand[:]
+        trial[best] = bit
+        result = search(trial, [best], order, scores, stats)
+        if result is not None:
+            return result
+        stats['backtracks'] += 1
+    return None
+
+
+def solve(puzzle, probabilities=None):
+    """
+    Solve one flat 81-digit puzzle. With (81, 9) probabilities from the
+    network the search is guided by them, otherwise it is the plain search.
+    Returns (solution as an (81,) uint8 array or None, stats).
+    """
+    if probabilities is None:
+        order, scores = PLAIN_ORDER, PLAIN_SCORES
+    else:
+        ranking = np.argsort(-probabilities, axis=1)
+        order = [[1 << int(digit) for digit in row] for row in ranking]
+        scores = probabilities.tolist()
+
+    cand, queue = [ALL] * 81, []
+    for cell, num in enumerate(puzzle):
+        if num:
+            cand[cell] = 1 << (int(num) - 1)
+            queue.append(cell)
+
+    stats = {'nodes': 0, 'backtracks': 0}
+    result = search(cand, queue, order, scores, stats)
+    if result is None:
+        return None, stats
+    return np.array([mask.bit_length() for mask in result], dtype=np.uint8), stats
+
+
+def solve_batch(puzzles, predictor=None):
+    """
+    Solve a batch of puzzles (anything inference.to_batch accepts). With a
+    Predictor the whole batch goes through the network in one call first.
+    Returns a list of (solution, stats).
+    """
+    batch = to_batch(puzzles)
+    probabilities = predictor.probabilities(batch) if predictor is not None else [None] * len(batch)
+    return [solve(puzzle, probs) for puzzle, probs in zip(batch, probabilities)]
+
+
+def benchmark(puzzles, predictor):
+    """
+    Run the plain and the CNN-guided search over the same puzzles and
+    report solved count, nodes, backtracks and wall time for each.
+    """
+    batch = to_batch(puzzles)
+    rows = []
+    for mode in ('plain', 'hybrid'):
+        start = time.perf_counter()
+        results = solve_batch(batch, predictor if mode == 'hybrid' else None)
+        elapsed = time.perf_counter() - start
+        for (solution, _), puzzle in zip(results, batch):
+            if solution is not None and not np.array_equal(solution[puzzle > 0], puzzle[puzzle > 0]):
+                raise AssertionError(f'{mode} search returned a grid that ignores the givens')
+        rows.append({
+            'mode': mode,
+            'solved': sum(solution is not None for solution, _ in results),
+            'nodes': sum(stats['nodes'] for _, stats in results),
+            'backtracks': sum(stats['backtracks'] for _, stats in results),
+            'wall_ms': elapsed * 1000,
+        })
+    return rows
+
+
+def read_puzzles(path, limit=None):
+    """
+    First 81-character field of every line of a puzzle file or 'puzzle,solution' CSV.
+    """
+    puzzles = []
+    with open(path) as f:
+        for line in f:
+            field = line.strip().split(',')[0]
+            if len(field) == 81 and not line.startswith('#'):
+                puzzles.append(field)
+                if limit and len(puzzles) >= limit:
+                    break
+    return puzzles
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the plain and the CNN-guided exact search.')
+    parser.add_argument('path')
+    parser.add_argument('--model', default='sudoku.pth')
+    parser.add_argument('--limit', type=int, default=1000)
+    parser.add_argument('--device', default=None)
+    parser.add_argument('--threads', type=int, default=None)
+    args = parser.parse_args()
+
+    predictor = Predictor(args.model, device=args.device, threads=args.threads)
+    puzzles = read_puzzles(args.path, args.limit)
+
+    print(f"{'mode':<8} {'solved':>8} {'nodes':>10} {'nodes/puz':>10} {'backtracks':>11} {'wall ms':>10}")
+    for row in benchmark(puzzles, predictor):
+        print(f"{row['mode']:<8} {row['solved']:>8} {row['nodes']:>10} {row['nodes'] / max(len(puzzles), 1):>10.1f} "
+              f"{row['backtracks']:>11} {row['wall_ms']:>10.1f}")
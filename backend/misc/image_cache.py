@@ -0,0 +1,120 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from vision import INK_THRESHOLD, binarize, cell_views
+
+SHIFT = 2  # pixels a re-detected grid may sit off by, along each axis
+MAX_CELL_DISTANCE = 0.25  # aligned share of a cell's ink that may differ
+BUCKET_SIZE = 8  # grids kept per inked-cell layout
+
+
+def content_hash(data):
+    """
+    SHA-256 of the uploaded bytes: identical files, before any decoding.
+    """
+    return hashlib.sha256(data).digest()
+
+
+def perceptual_hash(warped):
+    """
+    (layout, cells) fingerprint of a perspective-warped grid
+    (vision.warp_grid). layout marks the inked cells in 81 bits; ink density
+    is far from the threshold for real digits, so re-encoded copies share
+    it, and it is the L2 key. cells holds the binarised centre of every
+    inked cell, which same_digits() compares before an L2 hit is served.
+    """
+    patches = cell_views(binarize(warped)) > 0
+    inked = patches.mean(axis=(2, 3)) >= INK_THRESHOLD
+    return np.packbits(inked).tobytes(), patches[inked]
+
+
+def same_digits(cells, other):
+    """
+    Whether two grids with the same layout hold the same glyphs: every inked
+    cell, at the best offset of up to SHIFT pixels, differs from its
+    counterpart in at most MAX_CELL_DISTANCE of their combined ink.
+    """
+    side = cells.shape[-1]
+    padded = np.pad(other, ((0, 0), (SHIFT, SHIFT), (SHIFT, SHIFT)))
+    best = np.ones(len(cells))
+    for dy in range(2 * SHIFT + 1):
+        for dx in range(2 * SHIFT + 1):
+            shifted = padded[:, dy:dy + side, dx:dx + side]
+            differ = (cells ^ shifted).sum(axis=(1, 2))
+            ink = np.maximum((cells | shifted).sum(axis=(1, 2)), 1)
+            best = np.minimum(best, differ / ink)
+    return bool((best <= MAX_CELL_DISTANCE).all())
+
+
+class RecognitionCache:
+    """
+    Two-level, size-bounded LRU of recognized grids and their solutions. L1
+    is keyed by content_hash() and is checked before the upload is decoded;
+    L2 is keyed by the inked-cell layout from perceptual_hash() and catches
+    the same grid uploaded as different bytes, before inference: a grid
+    stored under that layout is only served when same_digits() confirms it
+    cell by cell, so grids that merely share a layout never collide. An L2
+    hit is promoted into L1.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self._by_content = OrderedDict()
+        self._by_image = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest):
+        with self._lock:
+            entry = self._by_content.get(digest)
+            if entry is not None:
+                self._by_content.move_to_end(digest)
+                self.l1_hits += 1
+            return entry
+
+    def get_image(self, phash, digest):
+        layout, cells = phash
+        with self._lock:
+            bucket = self._by_image.get(layout, ())
+            for index, (stored, entry) in enumerate(bucket):
+                if same_digits(cells, stored):
+                    bucket.append(bucket.pop(index))
+                    self._by_image.move_to_end(layout)
+                    self.l2_hits += 1
+                    self._insert(self._by_content, digest, entry)
+                    return entry
+            self.misses += 1
+            return None
+
+    def put(self, digest, phash, entry):
+        layout, cells = phash
+        with self._lock:
+            self._insert(self._by_content, digest, entry)
+            bucket = self._by_image.get(layout, [])
+            bucket.append((cells, entry))
+            del bucket[:-BUCKET_SIZE]
+            self._insert(self._by_image, layout, bucket)
+
+    def _insert(self, entries, key, entry):
+        entries[key] = entry
+        entries.move_to_end(key)
+        while len(entries) > self.maxsize:
+            entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.l1_hits + self.l2_hits + self.misses
+            return {
+                "l1_hits": self.l1_hits,
+                "l2_hits": self.l2_hits,
+                "misses": self.misses,
+                "hit_rate": (self.l1_hits + self.l2_hits) / lookups if lookups else 0.0,
+                "l1_size": len(self._by_content),
+                "l2_size": sum(len(bucket) for bucket in self._by_image.values()),
+                "maxsize": self.maxsize,
+            }
@@ -0,0 +1,75 @@
+import numpy as np
+import torch
+
+from cnn import CNN, select_device
+from dataset import to_digits
+
+
+def to_batch(puzzles):
+    """
+    Stack 81-character strings ('0' or '.' for blanks), 9x9 grids, flat
+    81-digit sequences or a ready (N, 81) / (N, 9, 9) array into one (N, 81)
+    uint8 array.
+    """
+    if isinstance(puzzles, np.ndarray):
+        return puzzles.astype(np.uint8, copy=False).reshape(-1, 81)
+    puzzles = list(puzzles)
+    if all(isinstance(puzzle, str) for puzzle in puzzles):
+        if any(len(puzzle) != 81 for puzzle in puzzles):
+            raise ValueError('Puzzle strings must contain exactly 81 characters.')
+        return to_digits(''.join(puzzles).encode())
+    return np.array(puzzles, dtype=np.uint8).reshape(-1, 81)
+
+
+class Predictor:
+    """
+    The trained CNN, loaded once onto the selected device (CUDA when
+    available, else CPU) for batched inference. batch_size bounds how many
+    puzzles go through one forward pass; threads sets torch's intra-op pool
+    for CPU serving.
+    """
+
+    def __init__(self, model_path='sudoku.pth', device=None, batch_size=512, threads=None):
+        self.device = select_device(device)
+        self.batch_size = batch_size
+        if threads:
+            torch.set_num_threads(threads)
+        self.model = CNN().to(self.device)
+        self.model.load_state_dict(torch.load(model_path, map_location=self.device))
+        self.model.eval()
+
+    def logits(self, batch):
+        """
+        Raw (N, 81, 9) model output for an (N, 81) uint8 array, as a tensor on the device.
+        """
+        with torch.inference_mode():
+            inputs = torch.from_numpy(batch).to(self.device).float().view(-1, 1, 9, 9)
+            return self.model(inputs)
+
+    def probabilities(self, puzzles):
+        """
+        (N, 81, 9) float32 softmax probabilities of the digits 1-9 for every cell.
+        """
+        batch = to_batch(puzzles)
+        out = np.empty((len(batch), 81, 9), dtype=np.float32)
+        for start in range(0, len(batch), self.batch_size):
+            chunk = batch[start:start + self.batch_size]
+            with torch.inference_mode():
+                out[start:start + len(chunk)] = torch.softmax(self.logits(chunk), dim=2).cpu().numpy()
+        return out
+
+    def predict(self, puzzles):
+        """
+        Predict every cell of a batch of puzzles. Returns (digits, confidences):
+        (N, 9, 9) uint8 digits 1-9 and (N, 9, 9) float32 softmax probabilities
+        of those digits. Givens are kept as they are, with confidence 1.
+        """
+        batch = to_batch(puzzles)
+        probabilities = self.probabilities(batch)
+        digits = probabilities.argmax(axis=2).astype(np.uint8) + 1
+        confidences = probabilities.max(axis=2)
+
+        given = batch > 0
+        digits[given] = batch[given]
+        confidences[given] = 1.0
+        return digits.reshape(-1, 9, 9), confidences.reshape(-1, 9, 9)
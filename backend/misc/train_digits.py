@@ -0,0 +1,124 @@
+import argparse
+
+import cv2
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.optim as optim
+from torch.utils.data import DataLoader, TensorDataset
+
+from cnn import select_device
+from vision import CELL, DIGIT, MARGIN, DigitNet, binarize
+
+FONTS = [
+    cv2.FONT_HERSHEY_SIMPLEX,
+    cv2.FONT_HERSHEY_PLAIN,
+    cv2.FONT_HERSHEY_DUPLEX,
+    cv2.FONT_HERSHEY_COMPLEX,
+    cv2.FONT_HERSHEY_TRIPLEX,
+    cv2.FONT_HERSHEY_COMPLEX_SMALL,
+]
+
+
+def render_cell(digit, rng):
+    """
+    One warped CELL x CELL cell holding a printed digit, dark on light, with
+    the jitter a photographed grid brings: font, size, stroke, offset, a
+    slight rotation, blur, noise and stray grid lines along the borders.
+    """
+    cell = np.full((CELL, CELL), rng.integers(170, 256), dtype=np.uint8)
+    font = FONTS[rng.integers(len(FONTS))]
+    thickness = int(rng.integers(1, 4))
+    (width, height), _ = cv2.getTextSize(str(digit), font, 1.0, thickness)
+    scale = CELL * rng.uniform(0.45, 0.7) / height
+    (width, height), _ = cv2.getTextSize(str(digit), font, scale, thickness)
+    x = (CELL - width) // 2 + int(rng.integers(-3, 4))
+    y = (CELL + height) // 2 + int(rng.integers(-3, 4))
+    cv2.putText(cell, str(digit), (x, y), font, scale, int(rng.integers(0, 90)), thickness, cv2.LINE_AA)
+
+    for _ in range(rng.integers(0, 3)):
+        offset = int(rng.integers(0, MARGIN))
+        if rng.random() < 0.5:
+            cell[:, offset if rng.random() < 0.5 else CELL - 1 - offset] = rng.integers(0, 90)
+        else:
+            cell[offset if rng.random() < 0.5 else CELL - 1 - offset, :] = rng.integers(0, 90)
+
+    matrix = cv2.getRotationMatrix2D((CELL / 2, CELL / 2), rng.uniform(-6, 6), rng.uniform(0.9, 1.1))
+    cell = cv2.warpAffine(cell, matrix, (CELL, CELL), borderMode=cv2.BORDER_REPLICATE)
+    if rng.random() < 0.5:
+        cell = cv2.GaussianBlur(cell, (3, 3), 0)
+    noise = rng.normal(0, rng.uniform(0, 12), cell.shape)
+    return np.clip(cell + noise, 0, 255).astype(np.uint8)
+
+
+def synthetic_digits(count, seed=None):
+    """
+    count (28, 28) float32 patches binarised and cropped exactly as
+    vision.read_grid does it, and their labels 0-8 for the digits 1-9.
+    """
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(0, 9, count)
+    patches = np.empty((count, DIGIT, DIGIT), dtype=np.float32)
+    for index, label in enumerate(labels):
+        binary = binarize(render_cell(label + 1, rng))
+        patches[index] = binary[MARGIN:MARGIN + DIGIT, MARGIN:MARGIN + DIGIT] / 255
+    return patches, labels
+
+
+def accuracy(model, loader, device):
+    model.eval()
+    correct = 0
+    with torch.inference_mode():
+        for patches, labels in loader:
+            output = model(patches.to(device).unsqueeze(1))
+            correct += (output.argmax(dim=1).cpu() == labels).sum().item()
+    return correct / len(loader.dataset)
+
+
+def train(model_path='digits.pth', samples=90000, epochs=5, batch_size=256, device=None, seed=0):
+    """
+    Train DigitNet on freshly rendered digits, keep the weights with the best
+    accuracy on a held-out rendered set and save them to model_path for
+    vision.load_classifier.
+    """
+    device = select_device(device)
+    patches, labels = synthetic_digits(samples, seed)
+    val_patches, val_labels = synthetic_digits(samples // 10, seed + 1)
+    train_loader = DataLoader(TensorDataset(torch.from_numpy(patches), torch.from_numpy(labels)), batch_size, shuffle=True)
+    val_loader = DataLoader(TensorDataset(torch.from_numpy(val_patches), torch.from_numpy(val_labels)), batch_size)
+
+    model = DigitNet().to(device)
+    criterion = nn.CrossEntropyLoss()
+    optimizer = optim.Adam(model.parameters(), lr=1e-3)
+    best = 0.0
+    for epoch in range(epochs):
+        model.train()
+        running_loss = 0.0
+        for batch, targets in train_loader:
+            batch, targets = batch.to(device).unsqueeze(1), targets.to(device)
+            optimizer.zero_grad()
+            loss = criterion(model(batch), targets)
+            loss.backward()
+            optimizer.step()
+            running_loss += loss.item() * len(batch)
+
+        val_accuracy = accuracy(model, val_loader, device)
+        print(f'Epoch {epoch + 1}, Train Loss: {running_loss / samples:.4f}, Validation Accuracy: {val_accuracy:.4f}')
+        if val_accuracy > best:
+            best = val_accuracy
+            torch.save(model.state_dict(), model_path)
+            print(f'Model improved and saved to {model_path}.')
+    return best
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Train the per-cell digit classifier of vision.py on rendered digits.')
+    parser.add_argument('--model', default='digits.pth')
+    parser.add_argument('--samples', type=int, default=90000)
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--device', default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    train(args.model, args.samples, args.epochs, args.batch_size, args.device, args.seed)
@@ -0,0 +1,199 @@
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from cnn import select_device
+
+CELL = 36  # warped cell side, in pixels
+DIGIT = 28  # side of the patch handed to the classifier, centred in the cell
+MARGIN = (CELL - DIGIT) // 2
+WARP = CELL * 9
+INK_THRESHOLD = 0.04  # share of inked pixels below which a cell counts as empty
+MIN_GRID_AREA = 0.1  # share of the photo the grid's outline must cover at least
+
+
+class DigitNet(nn.Module):
+    """
+    Small CNN classifying a 28x28 cell patch (white ink on black, in [0, 1])
+    as one of the digits 1-9. Empty cells never reach it. train_digits.py
+    trains it on rendered printed digits.
+    """
+
+    def __init__(self):
+        super(DigitNet, self).__init__()
+        self.conv1 = nn.Conv2d(1, 32, 3, padding=1)
+        self.conv2 = nn.Conv2d(32, 64, 3, padding=1)
+        self.fc1 = nn.Linear(64 * 7 * 7, 128)
+        self.fc2 = nn.Linear(128, 9)
+
+    def forward(self, x):
+        x = F.max_pool2d(F.relu(self.conv1(x)), 2)
+        x = F.max_pool2d(F.relu(self.conv2(x)), 2)
+        x = F.relu(self.fc1(x.flatten(1)))
+        return self.fc2(x)
+
+
+def load_classifier(model_path, device=None):
+    """
+    Load DigitNet weights once and return a function classifying a whole
+    (M, 28, 28) float32 batch of patches in one forward pass, as digits 1-9.
+    """
+    device = select_device(device)
+    model = DigitNet().to(device)
+    model.load_state_dict(torch.load(model_path, map_location=device))
+    model.eval()
+
+    def classify(patches):
+        with torch.inference_mode():
+            output = model(torch.from_numpy(patches).to(device).unsqueeze(1))
+        return output.argmax(dim=1).cpu().numpy() + 1
+
+    return classify
+
+
+def order_corners(points):
+    """
+    Four (x, y) points as top-left, top-right, bottom-right, bottom-left.
+    """
+    points = points.reshape(4, 2).astype(np.float32)
+    sums = points.sum(axis=1)
+    diffs = np.diff(points, axis=1).ravel()
+    return np.array([
+        points[np.argmin(sums)],
+        points[np.argmin(diffs)],
+        points[np.argmax(sums)],
+        points[np.argmax(diffs)],
+    ], dtype=np.float32)
+
+
+def find_grid(gray):
+    """
+    Corners of the largest quadrilateral outline in the image, the grid's
+    border, or None when there is no plausible one: no contour, one
+    covering less than MIN_GRID_AREA of the image (noise on a photo with no
+    grid), or a non-convex quadrilateral.
+    """
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+    thresh = cv2.adaptiveThreshold(blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 19, 5)
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+
+    contour = max(contours, key=cv2.contourArea)
+    if cv2.contourArea(contour) < MIN_GRID_AREA * gray.shape[0] * gray.shape[1]:
+        return None
+
+    approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+    if len(approx) == 4 and not cv2.isContourConvex(approx):
+        return None
+    if len(approx) != 4:
+        # Rounded or partly occluded border: fall back to its rotated bounding box
+        approx = cv2.boxPoints(cv2.minAreaRect(contour))
+    return order_corners(approx)
+
+
+def warp_grid(gray, corners):
+    """
+    Perspective-warp the grid onto a WARP x WARP square, 9 cells of CELL pixels a side.
+    """
+    target = np.array([[0, 0], [WARP - 1, 0], [WARP - 1, WARP - 1], [0, WARP - 1]], dtype=np.float32)
+    matrix = cv2.getPerspectiveTransform(corners, target)
+    return cv2.warpPerspective(gray, matrix, (WARP, WARP))
+
+
+def cell_views(binary):
+    """
+    (9, 9, 28, 28) view of the centre of every cell of the warped, binarised
+    grid. Reshaping and slicing only, so no pixel is copied; the margin
+    keeps the grid lines out of the patches.
+    """
+    cells = binary.reshape(9, CELL, 9, CELL).swapaxes(1, 2)
+    return cells[:, :, MARGIN:MARGIN + DIGIT, MARGIN:MARGIN + DIGIT]
+
+
+def binarize(warped):
+    """
+    Dark ink on light paper to white ink on black, the classifier's input.
+    """
+    return cv2.adaptiveThreshold(warped, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 7)
+
+
+def inked_cells(binary):
+    """
+    (9, 9) mask of the cells holding ink and their (M, 28, 28) float32
+    patches in [0, 1], in row-major order, ready for classify.
+    """
+    patches = cell_views(binary)
+    # Ink density on the uint8 views: an empty cell is mostly background
+    inked = patches.mean(axis=(2, 3)) / 255 >= INK_THRESHOLD
+    return inked, patches[inked].astype(np.float32) / 255
+
+
+def read_grid(image, classify, debug_dir=None):
+    """
+    Photo (BGR or grayscale array) to a 9x9 list of digits, 0 for empty
+    cells, or None when no grid is found. classify receives every inked
+    cell in one (M, 28, 28) float32 batch and returns M digits. With
+    debug_dir, the intermediate images are written there as PNGs.
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    corners = find_grid(gray)
+    if corners is None:
+        return None
+
+    warped = warp_grid(gray, corners)
+    binary = binarize(warped)
+    inked, batch = inked_cells(binary)
+
+    grid = np.zeros((9, 9), dtype=np.uint8)
+    if len(batch):
+        grid[inked] = classify(batch)
+
+    if debug_dir is not None:
+        write_debug(debug_dir, gray, corners, warped, binary, inked)
+    return grid.tolist()
+
+
+def write_debug(debug_dir, gray, corners, warped, binary, inked):
+    os.makedirs(debug_dir, exist_ok=True)
+    outline = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+    cv2.polylines(outline, [corners.astype(np.int32)], True, (0, 0, 255), 3)
+    cv2.imwrite(os.path.join(debug_dir, 'outline.png'), outline)
+    cv2.imwrite(os.path.join(debug_dir, 'warped.png'), warped)
+
+    cells = cv2.cvtColor(binary, cv2.COLOR_GRAY2BGR)
+    for row, col in zip(*np.nonzero(inked)):
+        x, y = col * CELL + MARGIN, row * CELL + MARGIN
+        cv2.rectangle(cells, (int(x), int(y)), (int(x) + DIGIT, int(y) + DIGIT), (0, 255, 0), 1)
+    cv2.imwrite(os.path.join(debug_dir, 'cells.png'), cells)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Read the digits of a photographed Sudoku grid.')
+    parser.add_argument('image')
+    parser.add_argument('--model', default='digits.pth', help='DigitNet weights, from train_digits.py')
+    parser.add_argument('--device', default=None)
+    parser.add_argument('--debug-dir', default=None, help='write intermediate images here')
+    args = parser.parse_args()
+
+    classify = load_classifier(args.model, args.device)
+    image = cv2.imread(args.image)
+    if image is None:
+        raise SystemExit(f'Could not read {args.image}')
+
+    start = time.perf_counter()
+    grid = read_grid(image, classify, args.debug_dir)
+    elapsed = time.perf_counter() - start
+
+    if grid is None:
+        print('Could not find the Sudoku grid contour.')
+    else:
+        for row in grid:
+            print(row)
+    print(f'{elapsed * 1000:.1f} ms')
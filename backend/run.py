@@ -1 +1,7 @@
-import solve_sudoku from services.solver
+from app import create_app
+from config import DevelopmentConfig
+
+app = create_app(DevelopmentConfig)
+
+if __name__ == '__main__':
+    app.run()
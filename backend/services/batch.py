@@ -0,0 +1,132 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, TimeoutError, wait
+from itertools import repeat
+
+from services.budget import Budget, BudgetExceeded
+from services.engines import ENGINES
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(workers=None):
+    # One pool per process, created on first use and kept for its lifetime.
+    # Its size is fixed by the first caller; later workers values are ignored
+    # so no request can shut down a pool another one is still using. First
+    # use happens on a request thread, so workers come from a forkserver
+    # rather than a fork of this multithreaded process.
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context())
+        return _executor
+
+
+def shutdown_executor():
+    # Stop the shared pool, e.g. when the server shuts down; the next
+    # get_executor() call starts a new one.
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _mp_context():
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+def solve_one(puzzle, engine, timeout_ms=None, max_nodes=None):
+    try:
+        solved = ENGINES[engine](puzzle, Budget(timeout_ms, max_nodes))
+    except BudgetExceeded as e:
+        return {"status": "budget_exceeded", "error": str(e)}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+    if solved:
+        return {"status": "solved", "solution": puzzle}
+    return {"status": "unsolvable", "error": "Puzzle could not be solved."}
+
+
+def solve_counted(puzzle, engine, timeout_ms=None, max_nodes=None):
+    # solve_one for callers that keep their own Budget: returns
+    # (solved, grid, stats, error), error set when the budget ran out.
+    budget = Budget(timeout_ms, max_nodes)
+    try:
+        solved = ENGINES[engine](puzzle, budget)
+    except BudgetExceeded as e:
+        return False, puzzle, budget.stats(), str(e)
+    return solved, puzzle, budget.stats(), None
+
+
+def solve_in_pool(engine, grid, budget, workers=None, poll=0.05):
+    # Solve grid in place on the process pool under what is left of budget,
+    # blocking the calling thread meanwhile. Its counters are added to budget.
+    # Cancellation is only seen between polls here: a solve that already
+    # started keeps its worker busy until it ends or its deadline passes.
+    timeout_ms = max_nodes = None
+    if budget.deadline is not None:
+        timeout_ms = (budget.deadline - time.monotonic()) * 1000
+        if timeout_ms <= 0:
+            raise BudgetExceeded("Time budget exceeded.")
+    if budget.max_nodes is not None:
+        max_nodes = budget.max_nodes - budget.nodes
+        if max_nodes <= 0:
+            raise BudgetExceeded("Node budget exceeded.")
+
+    future = get_executor(workers).submit(solve_counted, grid, engine, timeout_ms, max_nodes)
+    while True:
+        try:
+            solved, solution, stats, error = future.result(timeout=poll)
+            break
+        except TimeoutError:
+            if budget.cancelled is not None and budget.cancelled.is_set():
+                future.cancel()
+                raise BudgetExceeded("Solve was cancelled.")
+
+    budget.nodes += stats['nodes']
+    budget.backtracks += stats['backtracks']
+    budget.propagations += stats['propagations']
+    if error:
+        raise BudgetExceeded(error)
+    grid[:] = solution
+    return solved
+
+
+def solve_batch(puzzles, engine, workers=None, chunksize=1, timeout_ms=None, max_nodes=None):
+    executor = get_executor(workers)
+    return list(executor.map(
+        solve_one, puzzles, repeat(engine), repeat(timeout_ms), repeat(max_nodes), chunksize=chunksize
+    ))
+
+
+def solve_stream(puzzles, engine, workers=None, max_inflight=64, timeout_ms=None, max_nodes=None):
+    # puzzles yields (key, puzzle) pairs; at most max_inflight of them are held
+    # at once and (key, result) pairs come back as soon as each one finishes.
+    # A None puzzle is passed straight through as (key, None).
+    executor = get_executor(workers)
+    pending = {}
+    for key, puzzle in puzzles:
+        # Hand back whatever has finished since the last line, without waiting
+        if pending:
+            done, _ = wait(pending, timeout=0)
+            for future in done:
+                yield pending.pop(future), future.result()
+        if puzzle is None:
+            yield key, None
+            continue
+        if len(pending) >= max_inflight:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+        pending[executor.submit(solve_one, puzzle, engine, timeout_ms, max_nodes)] = key
+
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield pending.pop(future), future.result()
@@ -0,0 +1,58 @@
+from services import general
+
+# The 9x9 case of the generic engine, with its tables exposed for the
+# modules (rating, generator, vectorized) that work on 81-cell masks.
+GRID = general.layout(3)
+_, ALL, UNITS, PEERS, _, _ = GRID
+
+DIGIT_OF = {1 << d: d + 1 for d in range(9)}
+POPCOUNT = [bin(m).count('1') for m in range(ALL + 1)]
+
+ROWS, COLS, BOXES = UNITS[:9], UNITS[9:18], UNITS[18:]
+CELL_UNITS = [tuple(unit for unit in UNITS if cell in unit) for cell in range(81)]
+
+
+def propagate(cand, queue, budget=None):
+    return general.propagate(GRID, cand, queue, budget)
+
+
+def hidden_singles(cand, queue):
+    return general.hidden_singles(GRID, cand, queue)
+
+
+def reduce(cand, queue, budget=None):
+    return general.reduce(GRID, cand, queue, budget)
+
+
+def choose_cell(cand):
+    return general.choose_cell(cand, 9)
+
+
+def search(cand, queue, budget=None):
+    return general.search(GRID, cand, queue, budget)
+
+
+def count(cand, queue, limit, budget=None):
+    return general.count(GRID, cand, queue, limit, budget)
+
+
+def initial_candidates(arr):
+    _, cand, queue = general.initial_candidates(arr)
+    return cand, queue
+
+
+def solve_sudoku(arr, budget=None):
+    cand, queue = initial_candidates(arr)
+    result = search(cand, queue, budget)
+    if result is None:
+        return False
+
+    for row in range(9):
+        for col in range(9):
+            arr[row][col] = DIGIT_OF[result[row * 9 + col]]
+    return True
+
+
+def count_solutions(arr, limit=2, budget=None):
+    cand, queue = initial_candidates(arr)
+    return count(cand, queue, limit, budget)
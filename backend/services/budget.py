@@ -0,0 +1,35 @@
+import time
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+class Budget:
+    # Deadline, node budget and cancellation flag for one solve. Engines call
+    # tick() once per search node; the clock and the flag are only looked at
+    # every CHECK_EVERY nodes to keep the hot loop cheap. The same object
+    # collects the search statistics reported by stats().
+    CHECK_EVERY = 64
+
+    def __init__(self, timeout_ms=None, max_nodes=None, cancelled=None):
+        self.deadline = time.monotonic() + timeout_ms / 1000 if timeout_ms else None
+        self.max_nodes = max_nodes
+        self.cancelled = cancelled
+        self.nodes = 0
+        self.backtracks = 0
+        self.propagations = 0
+
+    def tick(self):
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise BudgetExceeded("Node budget exceeded.")
+        if self.nodes % self.CHECK_EVERY:
+            return
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise BudgetExceeded("Time budget exceeded.")
+        if self.cancelled is not None and self.cancelled.is_set():
+            raise BudgetExceeded("Solve was cancelled.")
+
+    def stats(self):
+        return {"nodes": self.nodes, "backtracks": self.backtracks, "propagations": self.propagations}
@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict
+
+from services.budget import BudgetExceeded
+from services.canonical import canonicalize, from_canonical, to_canonical
+
+
+class SolutionCache:
+    # Bounded LRU of solutions keyed by the canonical form of the puzzle, so
+    # relabeled, transposed or band/stack-permuted copies share one entry.
+    # Unsolvable puzzles are cached too, as None.
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def solve(self, puzzle, solver):
+        # Returns (solved, hit).
+        if self.maxsize <= 0:
+            return solver(puzzle), False
+
+        key, transform = canonicalize(puzzle)
+        if key is None:
+            return solver(puzzle), False
+
+        with self._lock:
+            found = key in self._entries
+            if found:
+                self._entries.move_to_end(key)
+                solution = self._entries[key]
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if found:
+            if solution is None:
+                return False, True
+            from_canonical(solution, transform, puzzle)
+            return True, True
+
+        solved = solver(puzzle)
+        solution = to_canonical(puzzle, transform) if solved else None
+        with self._lock:
+            self._entries[key] = solution
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return solved, False
+
+    def solve_budgeted(self, puzzle, solver, budget, probe_nodes, probe=None):
+        # Canonicalizing costs more than most solves, so the puzzle is first
+        # tried directly with at most probe_nodes search nodes. Only solves
+        # that outgrow the probe go through the cache, with the rest of the
+        # budget. solver and probe take (grid, budget); probe runs the short
+        # first attempt and defaults to solver. Returns (solved, hit).
+        probe = probe or solver
+        limit = budget.max_nodes
+        if self.maxsize <= 0 or (limit is not None and limit <= probe_nodes):
+            return probe(puzzle, budget), False
+
+        if probe_nodes:
+            trial = [row[:] for row in puzzle]
+            budget.max_nodes = probe_nodes
+            try:
+                solved = probe(trial, budget)
+            except BudgetExceeded:
+                if budget.nodes <= probe_nodes:
+                    raise  # Deadline or cancellation, not the probe running out
+                solved = None
+            finally:
+                budget.max_nodes = limit
+            if solved is not None:
+                for row, values in zip(puzzle, trial):
+                    row[:] = values
+                return solved, False
+
+        return self.solve(puzzle, lambda grid: solver(grid, budget))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
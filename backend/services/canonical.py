@@ -0,0 +1,157 @@
+from itertools import permutations, product
+
+# Grids with huge automorphism groups (nearly empty ones) tie on too many
+# transforms to be worth canonicalizing; they bypass the cache instead.
+MAX_STATES = 4096
+
+
+def _transpose(flat):
+    return tuple(flat[col * 9 + row] for row in range(9) for col in range(9))
+
+
+def _relabel(values, labels, next_label):
+    labels = list(labels)
+    out = []
+    for num in values:
+        if num:
+            label = labels[num]
+            if not label:
+                label = labels[num] = next_label
+                next_label += 1
+            out.append(label)
+        else:
+            out.append(0)
+    return tuple(out), labels, next_label
+
+
+def _first_row_orders(values):
+    # Column orders putting the first row's clues as far right as possible:
+    # stacks by ascending clue count, blanks before clues inside each stack.
+    stacks = []
+    for stack in range(3):
+        cols = range(stack * 3, stack * 3 + 3)
+        blanks = [col for col in cols if not values[col]]
+        clues = [col for col in cols if values[col]]
+        stacks.append((len(clues), [a + b for a in permutations(blanks) for b in permutations(clues)]))
+
+    orders = []
+    for stack_order in permutations(range(3)):
+        counts = [stacks[stack][0] for stack in stack_order]
+        if counts != sorted(counts):
+            continue
+        for inners in product(*(stacks[stack][1] for stack in stack_order)):
+            orders.append(sum(inners, ()))
+    return orders
+
+
+def _next_rows(rows_used):
+    depth = len(rows_used)
+    if depth % 3:
+        band = rows_used[-1] // 3
+        return [row for row in range(band * 3, band * 3 + 3) if row not in rows_used]
+    bands = {row // 3 for row in rows_used}
+    return [row for row in range(9) if row // 3 not in bands]
+
+
+def canonicalize(puzzle):
+    # Lexicographically smallest relabeled grid over transposition, band and
+    # stack swaps and row/column swaps inside them. Built one row at a time,
+    # keeping every partial transform that ties for the smallest prefix.
+    # Returns (key, transform) where transform is (transposed, rows, cols, labels),
+    # or (None, None) when the grid is too symmetric to canonicalize cheaply.
+    flat = tuple(num for row in puzzle for num in row)
+    grids = (flat, _transpose(flat))
+
+    # First row: the smallest relabeled row pushes its clues as far right as
+    # possible, which only depends on how many clues each stack holds.
+    best_pattern = None
+    firsts = []
+    for transposed, grid in enumerate(grids):
+        for row in range(9):
+            values = grid[row * 9:row * 9 + 9]
+            counts = sorted(sum(1 for num in values[stack * 3:stack * 3 + 3] if num) for stack in range(3))
+            pattern = tuple(bit for count in counts for bit in (0,) * (3 - count) + (1,) * count)
+            if best_pattern is None or pattern < best_pattern:
+                best_pattern, firsts = pattern, [(transposed, row)]
+            elif pattern == best_pattern:
+                firsts.append((transposed, row))
+
+    states = []
+    for transposed, row in firsts:
+        values = grids[transposed][row * 9:row * 9 + 9]
+        for cols in _first_row_orders(values):
+            out, labels, next_label = _relabel([values[col] for col in cols], [0] * 10, 1)
+            states.append((transposed, (row,), cols, labels, next_label))
+        if len(states) > MAX_STATES:
+            return None, None
+
+    for _ in range(8):
+        best = None
+        survivors = []
+        for transposed, rows, cols, labels, next_label in states:
+            grid = grids[transposed]
+            for row in _next_rows(rows):
+                base = row * 9
+                new_labels = labels[:]
+                new_next = next_label
+                out = []
+                tie = best is not None
+                for col in cols:
+                    num = grid[base + col]
+                    if num:
+                        label = new_labels[num]
+                        if not label:
+                            label = new_labels[num] = new_next
+                            new_next += 1
+                    else:
+                        label = 0
+                    if tie:
+                        # Drop this row as soon as it compares above the best one
+                        known = best[len(out)]
+                        if label > known:
+                            break
+                        if label < known:
+                            tie = False
+                            survivors = []
+                    out.append(label)
+                else:
+                    if not tie:
+                        best = out
+                    survivors.append((transposed, rows + (row,), cols, new_labels, new_next))
+        if len(survivors) > MAX_STATES:
+            return None, None
+        states = survivors
+
+    transposed, rows, cols, labels, next_label = states[0]
+    for num in range(1, 10):
+        if not labels[num]:
+            labels[num] = next_label
+            next_label += 1
+
+    grid = grids[transposed]
+    key = bytes(labels[grid[row * 9 + col]] for row in rows for col in cols)
+    return key, (transposed, rows, cols, labels)
+
+
+def to_canonical(puzzle, transform):
+    transposed, rows, cols, labels = transform
+    flat = tuple(num for row in puzzle for num in row)
+    if transposed:
+        flat = _transpose(flat)
+    return bytes(labels[flat[row * 9 + col]] for row in rows for col in cols)
+
+
+def from_canonical(key, transform, puzzle):
+    # Writes the canonical grid back into puzzle in its original orientation.
+    transposed, rows, cols, labels = transform
+    digits = [0] * 10
+    for num in range(1, 10):
+        digits[labels[num]] = num
+
+    for out_row, row in enumerate(rows):
+        for out_col, col in enumerate(cols):
+            num = digits[key[out_row * 9 + out_col]]
+            if transposed:
+                puzzle[col][row] = num
+            else:
+                puzzle[row][col] = num
@@ -0,0 +1,189 @@
+import threading
+from itertools import islice
+
+# Exact-cover columns: one per cell, then one per (row, digit), (col, digit) and (box, digit).
+COLUMNS = 324
+ROWS = 729
+
+
+def _row_columns(cell, digit):
+    row, col = divmod(cell, 9)
+    box = (row // 3) * 3 + col // 3
+    return (cell, 81 + row * 9 + digit, 162 + col * 9 + digit, 243 + box * 9 + digit)
+
+
+class DancingLinks:
+    # The whole 729 x 324 matrix lives in flat link arrays built once; solves
+    # cover the givens, search and uncover everything again, so the node pool
+    # is reused untouched between puzzles.
+
+    def __init__(self):
+        size = 1 + COLUMNS + ROWS * 4
+        self.L = L = list(range(-1, size - 1))
+        self.R = R = list(range(1, size + 1))
+        self.U = U = list(range(size))
+        self.D = D = list(range(size))
+        self.C = C = list(range(size))
+        self.S = [0] * (COLUMNS + 1)
+        self.row_of = [-1] * size
+        self.row_start = [0] * ROWS
+
+        L[0], R[COLUMNS] = COLUMNS, 0
+        node = COLUMNS + 1
+        for cell in range(81):
+            for digit in range(9):
+                row_id = cell * 9 + digit
+                self.row_start[row_id] = node
+                first = node
+                for column in _row_columns(cell, digit):
+                    header = column + 1
+                    C[node] = header
+                    self.row_of[node] = row_id
+                    U[node], D[node] = U[header], header
+                    D[U[header]] = node
+                    U[header] = node
+                    self.S[header] += 1
+                    node += 1
+                L[first], R[node - 1] = node - 1, first
+                for link in range(first + 1, node):
+                    L[link] = link - 1
+                for link in range(first, node - 1):
+                    R[link] = link + 1
+
+    def _cover(self, c):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        R[L[c]] = R[c]
+        L[R[c]] = L[c]
+        i = D[c]
+        while i != c:
+            j = R[i]
+            while j != i:
+                D[U[j]] = D[j]
+                U[D[j]] = U[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def _uncover(self, c):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        i = U[c]
+        while i != c:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                D[U[j]] = j
+                U[D[j]] = j
+                j = L[j]
+            i = U[i]
+        R[L[c]] = c
+        L[R[c]] = c
+
+    def _search(self, chosen, budget):
+        if budget is not None:
+            budget.tick()
+        R, D, C, S = self.R, self.D, self.C, self.S
+        column = R[0]
+        if column == 0:
+            yield chosen
+            return
+
+        best, best_size = column, S[column]
+        column = R[column]
+        while column != 0 and best_size > 1:
+            if S[column] < best_size:
+                best, best_size = column, S[column]
+            column = R[column]
+        if best_size == 0:
+            return
+
+        self._cover(best)
+        try:
+            r = D[best]
+            while r != best:
+                chosen.append(self.row_of[r])
+                j = R[r]
+                while j != r:
+                    self._cover(C[j])
+                    j = R[j]
+                try:
+                    yield from self._search(chosen, budget)
+                finally:
+                    j = self.L[r]
+                    while j != r:
+                        self._uncover(C[j])
+                        j = self.L[j]
+                    chosen.pop()
+                if budget is not None:
+                    budget.backtracks += 1
+                r = D[r]
+        finally:
+            self._uncover(best)
+
+    def solutions(self, arr, budget=None):
+        R, C = self.R, self.C
+        covered = []
+        chosen = []
+        try:
+            for row in range(9):
+                for col in range(9):
+                    num = arr[row][col]
+                    if not num:
+                        continue
+                    start = self.row_start[(row * 9 + col) * 9 + num - 1]
+                    node = start
+                    while True:
+                        header = C[node]
+                        if R[self.L[header]] != header:
+                            return  # Column already taken by a clashing given
+                        self._cover(header)
+                        covered.append(header)
+                        node = R[node]
+                        if node == start:
+                            break
+            yield from self._search(chosen, budget)
+        finally:
+            for header in reversed(covered):
+                self._uncover(header)
+
+
+_local = threading.local()
+
+
+def _pool():
+    links = getattr(_local, 'links', None)
+    if links is None:
+        links = _local.links = DancingLinks()
+    return links
+
+
+def _write(arr, chosen):
+    for row_id in chosen:
+        cell, digit = divmod(row_id, 9)
+        arr[cell // 9][cell % 9] = digit + 1
+
+
+def iter_solutions(arr, budget=None):
+    for chosen in _pool().solutions(arr, budget):
+        solution = [row[:] for row in arr]
+        _write(solution, chosen)
+        yield solution
+
+
+def count_solutions(arr, limit=2, budget=None):
+    generator = _pool().solutions(arr, budget)
+    try:
+        return sum(1 for _ in islice(generator, limit))
+    finally:
+        generator.close()
+
+
+def solve_sudoku(arr, budget=None):
+    generator = _pool().solutions(arr, budget)
+    try:
+        chosen = next(generator, None)
+        if chosen is None:
+            return False
+        _write(arr, chosen)
+        return True
+    finally:
+        generator.close()
@@ -0,0 +1,19 @@
+from services import bitmask, dlx, flat, general, solver
+
+ENGINES = {
+    'bitmask': bitmask.solve_sudoku,
+    'dlx': dlx.solve_sudoku,
+    'flat': flat.solve_sudoku,
+    'backtracking': solver.solve_sudoku,
+    'general': general.solve_sudoku,
+}
+
+COUNTERS = {
+    'bitmask': bitmask.count_solutions,
+    'dlx': dlx.count_solutions,
+}
+
+DEFAULT_ENGINE = 'bitmask'
+
+# The only engine for grids other than 9x9, and the default for them.
+SIZED_ENGINE = 'general'
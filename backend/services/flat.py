@@ -0,0 +1,88 @@
+from array import array
+
+ROW_OF = bytes(cell // 9 for cell in range(81))
+COL_OF = bytes(cell % 9 for cell in range(81))
+BOX_OF = bytes((cell // 27) * 3 + (cell % 9) // 3 for cell in range(81))
+POPCOUNT = bytes(bin(mask).count('1') for mask in range(512))
+
+
+def solve_board(board, budget=None):
+    # Solves a flat 81-cell bytearray / array('B') in place. The search is an
+    # explicit loop over preallocated arrays: the empty cells (reordered in
+    # place for MRV) and the candidates still to try at each depth.
+    rows = array('H', bytes(18))
+    cols = array('H', bytes(18))
+    boxes = array('H', bytes(18))
+    for cell in range(81):
+        num = board[cell]
+        if num:
+            bit = 1 << (num - 1)
+            row, col, box = ROW_OF[cell], COL_OF[cell], BOX_OF[cell]
+            if (rows[row] | cols[col] | boxes[box]) & bit:
+                return False
+            rows[row] |= bit
+            cols[col] |= bit
+            boxes[box] |= bit
+
+    empties = array('B', (cell for cell in range(81) if not board[cell]))
+    pending = array('H', bytes(2 * len(empties)))
+    total = len(empties)
+    depth = 0
+    descending = True
+
+    while True:
+        if descending:
+            if depth == total:
+                return True
+            if budget is not None:
+                budget.tick()
+
+            # Most constrained remaining cell moves to position depth.
+            best, best_mask, best_count = depth, 0, 10
+            for index in range(depth, total):
+                cell = empties[index]
+                mask = ~(rows[ROW_OF[cell]] | cols[COL_OF[cell]] | boxes[BOX_OF[cell]]) & 0x1FF
+                count = POPCOUNT[mask]
+                if count < best_count:
+                    best, best_mask, best_count = index, mask, count
+                    if count <= 1:
+                        break
+            empties[depth], empties[best] = empties[best], empties[depth]
+            pending[depth] = best_mask
+            cell = empties[depth]
+        else:
+            # Back at this depth: take the digit tried here off the board.
+            cell = empties[depth]
+            bit = 1 << (board[cell] - 1)
+            rows[ROW_OF[cell]] ^= bit
+            cols[COL_OF[cell]] ^= bit
+            boxes[BOX_OF[cell]] ^= bit
+            board[cell] = 0
+
+        mask = pending[depth]
+        if mask:
+            bit = mask & -mask
+            pending[depth] = mask ^ bit
+            board[cell] = bit.bit_length()
+            rows[ROW_OF[cell]] |= bit
+            cols[COL_OF[cell]] |= bit
+            boxes[BOX_OF[cell]] |= bit
+            depth += 1
+            descending = True
+        elif depth == 0:
+            return False
+        else:
+            depth -= 1
+            descending = False
+            if budget is not None:
+                budget.backtracks += 1
+
+
+def solve_sudoku(arr, budget=None):
+    board = bytearray(num for row in arr for num in row)
+    if not solve_board(board, budget):
+        return False
+    view = memoryview(board)
+    for row in range(9):
+        arr[row][:] = view[row * 9:row * 9 + 9]
+    return True
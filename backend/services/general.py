@@ -0,0 +1,276 @@
+from functools import lru_cache
+from math import isqrt
+
+# Grid sides the generic engine accepts: 9x9, 16x16 and 25x25.
+SIZES = (9, 16, 25)
+
+
+@lru_cache(maxsize=None)
+def layout(box):
+    # Units, peers, the units of each cell and the box/line intersections of
+    # a (box * box) x (box * box) grid, built once per size. Candidates are
+    # plain ints with one bit per digit, so a 25x25 mask is still a single
+    # machine word for Python's small-int arithmetic.
+    size = box * box
+    rows = [tuple(row * size + col for col in range(size)) for row in range(size)]
+    cols = [tuple(row * size + col for row in range(size)) for col in range(size)]
+    boxes = [
+        tuple((box_row + row) * size + box_col + col for row in range(box) for col in range(box))
+        for box_row in range(0, size, box)
+        for box_col in range(0, size, box)
+    ]
+    units = rows + cols + boxes
+    peers = [set() for _ in range(size * size)]
+    cell_units = [[] for _ in range(size * size)]
+    for index, unit in enumerate(units):
+        for cell in unit:
+            peers[cell].update(unit)
+            cell_units[cell].append(index)
+    peers = [tuple(sorted(cell_peers - {cell})) for cell, cell_peers in enumerate(peers)]
+    cell_units = [tuple(indices) for indices in cell_units]
+
+    # (box index, line index, shared cells, rest of the box, rest of the line)
+    segments = []
+    for box_index in range(2 * size, 3 * size):
+        box_cells = set(units[box_index])
+        for line_index in range(2 * size):
+            shared = tuple(cell for cell in units[line_index] if cell in box_cells)
+            if shared:
+                segments.append((
+                    box_index, line_index, shared,
+                    tuple(cell for cell in units[box_index] if cell not in shared),
+                    tuple(cell for cell in units[line_index] if cell not in shared),
+                ))
+    return size, (1 << size) - 1, units, peers, cell_units, segments
+
+
+def propagate(grid, cand, queue, budget=None, dirty=None, weights=None):
+    # Naked singles: every cell in the queue is fixed, strike its digit from its peers.
+    # The units of every cell that lost a candidate are added to dirty; on a
+    # contradiction both cells involved gain weight.
+    _, _, _, peers, cell_units, _ = grid
+    while queue:
+        cell = queue.pop()
+        if budget is not None:
+            budget.propagations += 1
+        bit = cand[cell]
+        for peer in peers[cell]:
+            mask = cand[peer]
+            if mask & bit:
+                mask ^= bit
+                if not mask:
+                    if weights is not None:
+                        weights[cell] += 1
+                        weights[peer] += 1
+                    return False
+                cand[peer] = mask
+                if dirty is not None:
+                    dirty.update(cell_units[peer])
+                if not mask & (mask - 1):
+                    queue.append(peer)
+    return True
+
+
+def hidden_singles(grid, cand, queue, dirty=None, weights=None):
+    # A digit that fits in only one cell of a unit must go there. Only the
+    # units in dirty (indices into the layout's units, all of them when None)
+    # can have changed since the last pass, so only those are scanned.
+    _, full, units, _, cell_units, _ = grid
+    if dirty is None:
+        dirty = set(range(len(units)))
+    while dirty:
+        unit = units[dirty.pop()]
+        once = twice = 0
+        for cell in unit:
+            mask = cand[cell]
+            twice |= once & mask
+            once |= mask
+        if once != full:
+            return blame(unit, weights)
+        singles = once & ~twice
+        if not singles:
+            continue
+        for cell in unit:
+            mask = cand[cell] & singles
+            if mask and mask != cand[cell]:
+                if mask & (mask - 1):
+                    return blame(unit, weights)
+                cand[cell] = mask
+                queue.append(cell)
+                dirty.update(cell_units[cell])
+    return True
+
+
+def locked_candidates(grid, cand, queue, touched, dirty, weights=None):
+    # Where a box meets a row or column, a digit confined to the shared cells
+    # in one of the two units is struck from the rest of the other. Only
+    # intersections with a unit in touched are looked at. Returns None on a
+    # contradiction, else whether anything was struck.
+    _, _, _, _, cell_units, segments = grid
+    changed = False
+    for box_index, line_index, shared, box_rest, line_rest in segments:
+        if box_index not in touched and line_index not in touched:
+            continue
+        inside = box_only = line_only = 0
+        for cell in shared:
+            inside |= cand[cell]
+        for cell in box_rest:
+            box_only |= cand[cell]
+        for cell in line_rest:
+            line_only |= cand[cell]
+        for strike, cells in ((inside & ~box_only & line_only, line_rest), (inside & ~line_only & box_only, box_rest)):
+            if not strike:
+                continue
+            for cell in cells:
+                mask = cand[cell]
+                if mask & strike:
+                    mask &= ~strike
+                    if not mask:
+                        blame(shared + cells, weights)
+                        return None
+                    cand[cell] = mask
+                    dirty.update(cell_units[cell])
+                    changed = True
+                    if not mask & (mask - 1):
+                        queue.append(cell)
+    return changed
+
+
+def blame(cells, weights):
+    # A contradiction within cells: each of them gains weight. Always False.
+    if weights is not None:
+        for cell in cells:
+            weights[cell] += 1
+    return False
+
+
+def reduce(grid, cand, queue, budget=None, dirty=None, weights=None):
+    # Singles to a fixpoint. On grids larger than 9x9, where the extra pass
+    # pays for itself, locked candidates are then applied over the units
+    # the singles touched, and the whole thing repeats until nothing changes.
+    if dirty is None:
+        dirty = set(range(len(grid[2])))
+    touched = set()
+    while True:
+        if not propagate(grid, cand, queue, budget, dirty, weights):
+            return False
+        touched |= dirty
+        if not hidden_singles(grid, cand, queue, dirty, weights):
+            return False
+        if queue:
+            continue
+        if grid[0] <= 9 or not touched:
+            return True
+        changed = locked_candidates(grid, cand, queue, touched, dirty, weights)
+        if changed is None:
+            return False
+        if not changed:
+            return True
+        touched = set()
+
+
+def choose_cell(cand, size, weights=None):
+    # Unfixed cell with the fewest candidates, or -1 when the grid is complete.
+    # With weights, ties go to the cell most involved in past contradictions.
+    best, best_count, best_weight = -1, size + 1, -1
+    for cell, mask in enumerate(cand):
+        if mask & (mask - 1):
+            count = mask.bit_count()
+            if weights is None:
+                if count < best_count:
+                    best, best_count = cell, count
+                    if count == 2:
+                        break
+            elif count < best_count or (count == best_count and weights[cell] > best_weight):
+                best, best_count, best_weight = cell, count, weights[cell]
+    return best
+
+
+def search(grid, cand, queue, budget=None, dirty=None, weights=None):
+    # dirty holds the units touched since the last full reduction; None
+    # means every unit, as for a fresh grid. weights, one counter per cell,
+    # steers branching towards the cells behind earlier dead ends.
+    if budget is not None:
+        budget.tick()
+    if not reduce(grid, cand, queue, budget, dirty, weights):
+        return None
+
+    best = choose_cell(cand, grid[0], weights)
+    if best < 0:
+        return cand  # Every cell is fixed
+
+    mask = cand[best]
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        trial = cand[:]
+        trial[best] = bit
+        result = search(grid, trial, [best], budget, set(grid[4][best]), weights)
+        if result is not None:
+            return result
+        if budget is not None:
+            budget.backtracks += 1
+
+    return None
+
+
+def count(grid, cand, queue, limit, budget=None, dirty=None, weights=None):
+    # Same search as above, but keeps going past the first solution and stops
+    # as soon as limit of them have been seen.
+    if budget is not None:
+        budget.tick()
+    if not reduce(grid, cand, queue, budget, dirty, weights):
+        return 0
+
+    best = choose_cell(cand, grid[0], weights)
+    if best < 0:
+        return 1
+
+    total = 0
+    mask = cand[best]
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        trial = cand[:]
+        trial[best] = bit
+        total += count(grid, trial, [best], limit - total, budget, set(grid[4][best]), weights)
+        if total >= limit:
+            break
+        if budget is not None:
+            budget.backtracks += 1
+    return total
+
+
+def box_size(arr):
+    box = isqrt(len(arr))
+    if box * box != len(arr) or len(arr) not in SIZES:
+        raise ValueError(f"Unsupported grid size: {len(arr)}.")
+    return box
+
+
+def initial_candidates(arr):
+    grid = layout(box_size(arr))
+    size, full, _, _, _, _ = grid
+    cand = [full] * (size * size)
+    queue = []
+    for row in range(size):
+        for col in range(size):
+            num = arr[row][col]
+            if num:
+                cell = row * size + col
+                cand[cell] = 1 << (num - 1)
+                queue.append(cell)
+    return grid, cand, queue
+
+
+def solve_sudoku(arr, budget=None):
+    grid, cand, queue = initial_candidates(arr)
+    result = search(grid, cand, queue, budget, weights=[0] * len(cand))
+    if result is None:
+        return False
+
+    size = grid[0]
+    for row in range(size):
+        for col in range(size):
+            arr[row][col] = result[row * size + col].bit_length()
+    return True
@@ -0,0 +1,87 @@
+import random
+
+from services import bitmask
+from services.batch import get_executor
+
+SYMMETRIES = {
+    'none': lambda cell: (cell,),
+    'rotational': lambda cell: tuple(sorted({cell, 80 - cell})),
+    'mirror': lambda cell: tuple(sorted({cell, cell - cell % 9 + 8 - cell % 9})),
+    'diagonal': lambda cell: tuple(sorted({cell, (cell % 9) * 9 + cell // 9})),
+}
+
+
+def random_grid(rng):
+    # The three diagonal boxes don't constrain each other, so they can be
+    # filled with random permutations before the solver completes the grid.
+    cells = [0] * 81
+    for box in (0, 4, 8):
+        digits = rng.sample(range(1, 10), 9)
+        for cell, num in zip(bitmask.BOXES[box], digits):
+            cells[cell] = num
+    grid = [cells[row * 9:row * 9 + 9] for row in range(9)]
+    bitmask.solve_sudoku(grid)
+
+    # Shuffle within the symmetry group so the solver's fill order doesn't show.
+    bands = rng.sample(range(3), 3)
+    rows = [band * 3 + row for band in bands for row in rng.sample(range(3), 3)]
+    stacks = rng.sample(range(3), 3)
+    cols = [stack * 3 + col for stack in stacks for col in rng.sample(range(3), 3)]
+    grid = [[grid[row][col] for col in cols] for row in rows]
+    if rng.random() < 0.5:
+        grid = [list(row) for row in zip(*grid)]
+    return grid
+
+
+def has_other_solution(cells, cell, num):
+    # Is there a solution of the puzzle (flat, with cell blanked) where cell
+    # holds something other than num? Blanking a clue keeps the solution unique
+    # exactly when there isn't, so one search replaces a full solution count.
+    cand, queue = bitmask.initial_candidates([cells[row * 9:row * 9 + 9] for row in range(9)])
+    mask = cand[cell] & ~(1 << (num - 1))
+    cand[cell] = mask
+    if not mask & (mask - 1):
+        queue.append(cell)
+    return bitmask.search(cand, queue) is not None
+
+
+def generate(clues=None, symmetry='none', seed=None):
+    rng = random.Random(seed)
+    orbit = SYMMETRIES[symmetry]
+    target = clues or 0
+
+    solution = random_grid(rng)
+    cells = [num for row in solution for num in row]
+    count = 81
+
+    groups = sorted({orbit(cell) for cell in range(81)})
+    rng.shuffle(groups)
+    for group in groups:
+        if count - len(group) < target:
+            continue
+        removed = [(cell, cells[cell]) for cell in group]
+        for cell, _ in removed:
+            cells[cell] = 0
+        if any(has_other_solution(cells, cell, num) for cell, num in removed):
+            for cell, num in removed:
+                cells[cell] = num
+            continue
+        count -= len(group)
+        if count == target:
+            break
+
+    return {
+        "puzzle": [cells[row * 9:row * 9 + 9] for row in range(9)],
+        "solution": solution,
+        "clues": count,
+    }
+
+
+def generate_one(args):
+    return generate(*args)
+
+
+def generate_batch(count, clues=None, symmetry='none', seed=None, workers=None):
+    rng = random.Random(seed)
+    jobs = [(clues, symmetry, rng.getrandbits(64)) for _ in range(count)]
+    return list(get_executor(workers).map(generate_one, jobs, chunksize=max(1, count // 64)))
@@ -0,0 +1,121 @@
+import json
+from math import isqrt
+
+
+GRID_ERROR = "Puzzle must be a 9x9 grid."
+VALUE_ERROR = "Puzzle can only contain integers between 0 and 9."
+
+
+def validate_puzzle(puzzle, sizes=(9,)):
+    # Shape and contents in a single pass over the rows. sizes lists the
+    # accepted grid sides (see services.general.SIZES).
+    if type(puzzle) is not list or len(puzzle) not in sizes:
+        return grid_error(sizes)
+
+    size = len(puzzle)
+    for row in puzzle:
+        if type(row) is not list or len(row) != size:
+            return grid_error(sizes)
+        for num in row:
+            if type(num) is not int or not 0 <= num <= size:
+                return VALUE_ERROR if size == 9 else f"Puzzle can only contain integers between 0 and {size}."
+
+    return None
+
+
+def grid_error(sizes):
+    if sizes == (9,):
+        return GRID_ERROR
+    names = [f"{size}x{size}" for size in sizes]
+    return f"Puzzle must be a {', '.join(names[:-1])} or {names[-1]} grid."
+
+
+def find_conflicts(puzzle):
+    # One pass over the givens with a digit mask per row, column and box.
+    # Returns (duplicates, blocked): the [row, col] of every given that repeats
+    # a digit in one of its units, and of every blank no digit can fill.
+    size = len(puzzle)
+    box_side = isqrt(size)
+    rows, cols, boxes = [0] * size, [0] * size, [0] * size
+    first = {}
+    duplicates = set()
+    for row in range(size):
+        for col in range(size):
+            num = puzzle[row][col]
+            if not num:
+                continue
+            bit = 1 << num
+            box = row // box_side * box_side + col // box_side
+            for kind, masks, unit in ((0, rows, row), (1, cols, col), (2, boxes, box)):
+                if masks[unit] & bit:
+                    duplicates.add(first[kind, unit, num])
+                    duplicates.add((row, col))
+                else:
+                    masks[unit] |= bit
+                    first[kind, unit, num] = (row, col)
+
+    full = (1 << (size + 1)) - 2
+    blocked = [
+        [row, col]
+        for row in range(size)
+        for col in range(size)
+        if not puzzle[row][col]
+        and rows[row] | cols[col] | boxes[row // box_side * box_side + col // box_side] == full
+    ]
+    return [list(cell) for cell in sorted(duplicates)], blocked
+
+
+def conflict_error(puzzle):
+    # (message, conflicts) for a puzzle that can't have a solution, else (None, None).
+    duplicates, blocked = find_conflicts(puzzle)
+    if duplicates:
+        return "Puzzle repeats a digit in a row, column or box.", {"duplicates": duplicates, "blocked": blocked}
+    if blocked:
+        return "Puzzle has empty cells with no possible digit.", {"duplicates": duplicates, "blocked": blocked}
+    return None, None
+
+
+def parse_string(text):
+    # 81 characters, digits with '0' or '.' for blanks, row by row.
+    if len(text) != 81:
+        return None, "Puzzle string must contain exactly 81 characters."
+
+    data = text.replace('.', '0')
+    if not (data.isascii() and data.isdigit()):
+        return None, "Puzzle string can only contain digits and '.'."
+
+    cells = data.encode()
+    return [[num - 48 for num in cells[row:row + 9]] for row in range(0, 81, 9)], None
+
+
+def format_string(puzzle):
+    return bytes(num + 48 for row in puzzle for num in row).decode()
+
+
+def parse_puzzle(puzzle, sizes=(9,)):
+    # Accepts the array form (any of sizes) or the 81-character string form.
+    # Returns (grid, compact, error), compact telling which form came in.
+    if type(puzzle) is str:
+        grid, error = parse_string(puzzle)
+        return grid, True, error
+
+    error = validate_puzzle(puzzle, sizes)
+    return (None if error else puzzle), False, error
+
+
+def parse_line(line):
+    # Returns (puzzle, compact, error) for one NDJSON line holding either a
+    # 9x9 array or an 81-character string, bare or quoted.
+    try:
+        text = line.decode().strip()
+    except UnicodeDecodeError:
+        return None, False, "Line is not valid UTF-8."
+
+    if text.startswith('['):
+        try:
+            puzzle = json.loads(text)
+        except ValueError:
+            return None, False, "Line is not valid JSON."
+        return parse_puzzle(puzzle)
+
+    return parse_puzzle(text.strip('"'))
@@ -0,0 +1,65 @@
+import threading
+
+# Upper bounds, in seconds, of the solve latency histogram buckets.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metrics:
+    # Process-wide solver counters, rendered in the Prometheus text format.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._outcomes = {}
+        self._search = {}
+        self._latency = {}
+
+    def record(self, engine, outcome, seconds=None, stats=None):
+        with self._lock:
+            key = (engine, outcome)
+            self._outcomes[key] = self._outcomes.get(key, 0) + 1
+
+            if stats:
+                totals = self._search.setdefault(engine, {"nodes": 0, "backtracks": 0, "propagations": 0})
+                for name in totals:
+                    totals[name] += stats.get(name, 0)
+
+            if seconds is not None:
+                histogram = self._latency.setdefault(engine, {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0})
+                for index, bound in enumerate(LATENCY_BUCKETS):
+                    if seconds <= bound:
+                        histogram["buckets"][index] += 1
+                histogram["sum"] += seconds
+                histogram["count"] += 1
+
+    def render(self, cache_stats=None):
+        with self._lock:
+            lines = [
+                '# HELP sudoku_solve_requests_total Solve requests by engine and outcome.',
+                '# TYPE sudoku_solve_requests_total counter',
+            ]
+            for (engine, outcome), value in sorted(self._outcomes.items()):
+                lines.append(f'sudoku_solve_requests_total{{engine="{engine}",outcome="{outcome}"}} {value}')
+
+            for name in ("nodes", "backtracks", "propagations"):
+                lines.append(f'# HELP sudoku_solve_{name}_total Search {name} across all solves.')
+                lines.append(f'# TYPE sudoku_solve_{name}_total counter')
+                for engine, totals in sorted(self._search.items()):
+                    lines.append(f'sudoku_solve_{name}_total{{engine="{engine}"}} {totals[name]}')
+
+            lines.append('# HELP sudoku_solve_duration_seconds Wall time spent solving.')
+            lines.append('# TYPE sudoku_solve_duration_seconds histogram')
+            for engine, histogram in sorted(self._latency.items()):
+                for bound, value in zip(LATENCY_BUCKETS, histogram["buckets"]):
+                    lines.append(f'sudoku_solve_duration_seconds_bucket{{engine="{engine}",le="{bound}"}} {value}')
+                lines.append(f'sudoku_solve_duration_seconds_bucket{{engine="{engine}",le="+Inf"}} {histogram["count"]}')
+                lines.append(f'sudoku_solve_duration_seconds_sum{{engine="{engine}"}} {histogram["sum"]}')
+                lines.append(f'sudoku_solve_duration_seconds_count{{engine="{engine}"}} {histogram["count"]}')
+
+        if cache_stats:
+            for name in ("hits", "misses", "size"):
+                kind = 'gauge' if name == 'size' else 'counter'
+                suffix = '' if name == 'size' else '_total'
+                lines.append(f'# TYPE sudoku_solution_cache_{name}{suffix} {kind}')
+                lines.append(f'sudoku_solution_cache_{name}{suffix} {cache_stats[name]}')
+
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,326 @@
+import argparse
+import sys
+from collections import deque
+from itertools import combinations
+
+from services import bitmask
+from services.batch import get_executor
+from services.grid import parse_string
+
+ALL = bitmask.ALL
+POPCOUNT = bitmask.POPCOUNT
+UNITS = bitmask.UNITS
+ROWS, COLS, BOXES = bitmask.ROWS, bitmask.COLS, bitmask.BOXES
+PEER_SETS = [frozenset(peers) for peers in bitmask.PEERS]
+BITS = [1 << digit for digit in range(9)]
+
+# Where a box meets a row or column, as sets, for locked candidates.
+BOX_LINES = [
+    (set(box), set(line))
+    for box in BOXES
+    for line in ROWS + COLS
+    if len(set(box) & set(line)) == 3
+]
+
+
+class Contradiction(Exception):
+    pass
+
+
+class Grid:
+    # Candidate state for rating: one 9-bit mask per cell plus which cells
+    # have been placed and had their digit removed from their peers.
+
+    def __init__(self, cells):
+        self.cand = [ALL] * 81
+        self.placed = [False] * 81
+        for cell, num in enumerate(cells):
+            if num:
+                self.cand[cell] = BITS[num - 1]
+        for cell, num in enumerate(cells):
+            if num:
+                self.place(cell)
+
+    def place(self, cell):
+        bit = self.cand[cell]
+        self.placed[cell] = True
+        for peer in bitmask.PEERS[cell]:
+            self.eliminate(peer, bit)
+
+    def eliminate(self, cell, bits):
+        mask = self.cand[cell]
+        if not mask & bits:
+            return False
+        mask &= ~bits
+        if not mask:
+            raise Contradiction
+        self.cand[cell] = mask
+        return True
+
+    def solved(self):
+        return all(self.placed)
+
+    def cells_with(self, unit, bit):
+        return [cell for cell in unit if not self.placed[cell] and self.cand[cell] & bit]
+
+
+def naked_single(grid):
+    progress = 0
+    for cell in range(81):
+        if not grid.placed[cell] and POPCOUNT[grid.cand[cell]] == 1:
+            grid.place(cell)
+            progress += 1
+    return progress
+
+
+def hidden_single(grid):
+    progress = 0
+    for unit in UNITS:
+        for bit in BITS:
+            cells = [cell for cell in unit if grid.cand[cell] & bit]
+            if not cells:
+                raise Contradiction
+            if len(cells) == 1 and not grid.placed[cells[0]]:
+                grid.cand[cells[0]] = bit
+                grid.place(cells[0])
+                progress += 1
+    return progress
+
+
+def locked_candidates(grid):
+    # Pointing (a box's candidates sit on one line) and claiming (a line's
+    # candidates sit in one box) both clear the rest of the other unit.
+    for box, line in BOX_LINES:
+        for bit in BITS:
+            in_box = {cell for cell in box if not grid.placed[cell] and grid.cand[cell] & bit}
+            in_line = {cell for cell in line if not grid.placed[cell] and grid.cand[cell] & bit}
+            shared = in_box & line
+            if not shared:
+                continue
+            targets = set()
+            if in_box == shared:
+                targets |= in_line - box
+            if in_line == shared:
+                targets |= in_box - line
+            if sum(grid.eliminate(cell, bit) for cell in targets):
+                return 1
+    return 0
+
+
+def naked_subset(size):
+    def technique(grid):
+        for unit in UNITS:
+            open_cells = [cell for cell in unit if not grid.placed[cell] and POPCOUNT[grid.cand[cell]] <= size]
+            for subset in combinations(open_cells, size):
+                union = 0
+                for cell in subset:
+                    union |= grid.cand[cell]
+                if POPCOUNT[union] != size:
+                    continue
+                others = [cell for cell in unit if cell not in subset and not grid.placed[cell]]
+                if sum(grid.eliminate(cell, union) for cell in others):
+                    return 1
+        return 0
+    return technique
+
+
+def hidden_subset(size):
+    def technique(grid):
+        for unit in UNITS:
+            open_cells = [cell for cell in unit if not grid.placed[cell]]
+            positions = {}
+            for bit in BITS:
+                cells = frozenset(cell for cell in open_cells if grid.cand[cell] & bit)
+                if 1 < len(cells) <= size:
+                    positions[bit] = cells
+            for bits in combinations(positions, size):
+                cells = frozenset().union(*(positions[bit] for bit in bits))
+                if len(cells) != size:
+                    continue
+                keep = sum(bits)
+                if sum(grid.eliminate(cell, ALL & ~keep) for cell in cells):
+                    return 1
+        return 0
+    return technique
+
+
+def fish(size):
+    # X-wing (2) and swordfish (3): size base lines whose candidates for a
+    # digit fall into size cover lines clear that digit from the cover lines.
+    def technique(grid):
+        for bases, covers, cover_of in ((ROWS, COLS, lambda cell: cell % 9), (COLS, ROWS, lambda cell: cell // 9)):
+            for bit in BITS:
+                lines = []
+                for base in bases:
+                    cells = grid.cells_with(base, bit)
+                    if 1 < len(cells) <= size:
+                        lines.append((base, {cover_of(cell) for cell in cells}))
+                for subset in combinations(lines, size):
+                    cover = set().union(*(spots for _, spots in subset))
+                    if len(cover) != size:
+                        continue
+                    base_cells = {cell for base, _ in subset for cell in base}
+                    targets = [
+                        cell
+                        for index in cover
+                        for cell in grid.cells_with(covers[index], bit)
+                        if cell not in base_cells
+                    ]
+                    if sum(grid.eliminate(cell, bit) for cell in targets):
+                        return 1
+        return 0
+    return technique
+
+
+def simple_coloring(grid):
+    for bit in BITS:
+        links = {}
+        for unit in UNITS:
+            cells = grid.cells_with(unit, bit)
+            if len(cells) == 2:
+                a, b = cells
+                links.setdefault(a, set()).add(b)
+                links.setdefault(b, set()).add(a)
+
+        seen = set()
+        for start in links:
+            if start in seen:
+                continue
+            colors = {start: 0}
+            stack = [start]
+            while stack:
+                cell = stack.pop()
+                for other in links[cell]:
+                    if other not in colors:
+                        colors[other] = 1 - colors[cell]
+                        stack.append(other)
+            seen.update(colors)
+            groups = ([cell for cell, color in colors.items() if color == 0],
+                      [cell for cell, color in colors.items() if color == 1])
+
+            # Color wrap: two cells of one color see each other, so that color is false.
+            for group in groups:
+                if any(b in PEER_SETS[a] for a, b in combinations(group, 2)):
+                    if sum(grid.eliminate(cell, bit) for cell in group):
+                        return 1
+
+            # Color trap: a cell seeing both colors can't hold the digit.
+            targets = [
+                cell
+                for cell in range(81)
+                if cell not in colors
+                and not grid.placed[cell]
+                and grid.cand[cell] & bit
+                and any(other in PEER_SETS[cell] for other in groups[0])
+                and any(other in PEER_SETS[cell] for other in groups[1])
+            ]
+            if sum(grid.eliminate(cell, bit) for cell in targets):
+                return 1
+    return 0
+
+
+# (name, weight, technique) from easiest to hardest. Each step applies the
+# easiest technique that makes progress, then starts again from the top.
+TECHNIQUES = [
+    ('naked_single', 1, naked_single),
+    ('hidden_single', 2, hidden_single),
+    ('locked_candidates', 5, locked_candidates),
+    ('naked_pair', 8, naked_subset(2)),
+    ('hidden_pair', 10, hidden_subset(2)),
+    ('naked_triple', 12, naked_subset(3)),
+    ('hidden_triple', 15, hidden_subset(3)),
+    ('x_wing', 20, fish(2)),
+    ('swordfish', 30, fish(3)),
+    ('simple_coloring', 40, simple_coloring),
+]
+SEARCH = ('search', 100)
+
+
+def rate(cells):
+    # Rates a flat 81-cell puzzle. Returns a dict with the score, the hardest
+    # technique needed ('search' when the ladder stalls and a guess is needed,
+    # 'invalid' when there is no solution) and how often each technique fired.
+    result = {"score": 0, "hardest": None, "steps": {}}
+    level = -1
+    try:
+        grid = Grid(cells)
+        while not grid.solved():
+            for index, (name, weight, technique) in enumerate(TECHNIQUES):
+                progress = technique(grid)
+                if progress:
+                    result["score"] += weight * progress
+                    result["steps"][name] = result["steps"].get(name, 0) + progress
+                    level = max(level, index)
+                    break
+            else:
+                break
+    except Contradiction:
+        return {"score": None, "hardest": 'invalid', "steps": result["steps"]}
+
+    if not grid.solved():
+        cand = grid.cand[:]
+        if bitmask.search(cand, [cell for cell in range(81) if POPCOUNT[cand[cell]] == 1]) is None:
+            return {"score": None, "hardest": 'invalid', "steps": result["steps"]}
+        result["score"] += SEARCH[1]
+        result["hardest"] = SEARCH[0]
+        return result
+
+    result["hardest"] = TECHNIQUES[level][0] if level >= 0 else None
+    return result
+
+
+def rate_line(line):
+    puzzle, error = parse_string(line.strip().split(',')[0])
+    if error:
+        return {"score": None, "hardest": 'invalid', "steps": {}}
+    return rate([num for row in puzzle for num in row])
+
+
+def rate_lines(lines):
+    return [rate_line(line) for line in lines]
+
+
+def read_chunks(f, chunksize):
+    chunk = []
+    for line in f:
+        line = line.strip()
+        if line and not line.startswith('puzzle'):
+            chunk.append(line)
+            if len(chunk) == chunksize:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def rate_file(path, workers=None, chunksize=256, max_inflight=64):
+    # Yields (puzzle, rating) for every line of a puzzle file (one 81-character
+    # puzzle per line, or the 'puzzle,solution' CSV), rated across the pool in
+    # input order. The file is read chunksize lines at a time and at most
+    # max_inflight chunks are held at once, so memory stays flat.
+    executor = get_executor(workers)
+    pending = deque()
+    with open(path) as f:
+        for chunk in read_chunks(f, chunksize):
+            if len(pending) >= max_inflight:
+                yield from finished(*pending.popleft())
+            pending.append((chunk, executor.submit(rate_lines, chunk)))
+        while pending:
+            yield from finished(*pending.popleft())
+
+
+def finished(chunk, future):
+    for line, rating in zip(chunk, future.result()):
+        yield line.split(',')[0], rating
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Rate every puzzle of a file by the techniques it needs.")
+    parser.add_argument('path')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    sys.stdout.write('puzzle,score,hardest\n')
+    for puzzle, rating in rate_file(args.path, args.workers):
+        score = '' if rating["score"] is None else rating["score"]
+        sys.stdout.write(f'{puzzle},{score},{rating["hardest"]}\n')
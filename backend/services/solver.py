@@ -28,7 +28,10 @@ def used_in_box(arr, box_start_row, box_start_col, num):
 def is_safe(arr, row, col, num):
     return not used_in_row(arr, row, num) and not used_in_col(arr, col, num) and not used_in_box(arr, row - row % 3, col - col % 3, num)
 
-def solve_sudoku(arr):
+def solve_sudoku(arr, budget=None):
+    if budget is not None:
+        budget.tick()
+
     l = [0, 0]
     if not find_empty_location(arr, l):
         return True  # Success!
@@ -39,17 +42,19 @@ def solve_sudoku(arr):
         if is_safe(arr, row, col, num):
             arr[row][col] = num
 
-            if solve_sudoku(arr):
+            if solve_sudoku(arr, budget):
                 return True
 
             arr[row][col] = 0  # Backtrack
+            if budget is not None:
+                budget.backtracks += 1
 
     return False  # Triggers backtracking
 
 if __name__ == '__main__':
     # Define a Sudoku puzzle (0's represent empty cells)
     puzzle = [
-        [5, 3, 3, 0, 7, 0, 0, 0, 0],
+        [5, 3, 0, 0, 7, 0, 0, 0, 0],
         [6, 0, 0, 1, 9, 5, 0, 0, 0],
         [0, 9, 8, 0, 0, 0, 0, 6, 0],
         [8, 0, 0, 0, 6, 0, 0, 0, 3],
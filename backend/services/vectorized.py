@@ -0,0 +1,145 @@
+import sys
+import time
+
+import numpy as np
+
+from services import bitmask
+
+UNIT_INDEX = np.array(bitmask.UNITS)  # (27, 9): rows, then columns, then boxes
+CELL_UNITS = np.array([[bitmask.UNITS.index(unit) for unit in units] for units in bitmask.CELL_UNITS])  # (81, 3)
+
+WEIGHTS = (1 << np.arange(9)).astype(np.uint16)
+POPCOUNT = np.array(bitmask.POPCOUNT, dtype=np.uint8)
+
+
+def to_candidates(grids):
+    # (N, 81) digits with 0 for blanks -> (N, 81, 9) boolean candidates.
+    grids = np.asarray(grids, dtype=np.uint8).reshape(-1, 81)
+    cand = np.ones(grids.shape + (9,), dtype=bool)
+    given = grids > 0
+    cand[given] = False
+    cand[given, grids[given] - 1] = True
+    return cand
+
+
+def pack(cand):
+    # (N, 81, 9) booleans -> (N, 81) 9-bit masks, the layout the elimination loop runs on.
+    return (cand * WEIGHTS).sum(axis=2, dtype=np.uint16)
+
+
+def unpack(masks):
+    return ((masks[:, :, None] >> np.arange(9)) & 1).astype(bool)
+
+
+def eliminate(masks):
+    # One round of naked and hidden singles over the whole batch. Returns the
+    # new masks and a per-puzzle contradiction flag.
+    single = POPCOUNT[masks] == 1
+    fixed = np.where(single, masks, 0)
+    in_units = fixed[:, UNIT_INDEX]
+    placed = np.bitwise_or.reduce(in_units, axis=2)  # (N, 27)
+    clash = (POPCOUNT[in_units].sum(axis=2) != POPCOUNT[placed]).any(axis=1)
+    seen = placed[:, CELL_UNITS[:, 0]] | placed[:, CELL_UNITS[:, 1]] | placed[:, CELL_UNITS[:, 2]]
+    masks = np.where(single, masks, masks & ~seen)
+
+    in_units = masks[:, UNIT_INDEX]
+    once = np.zeros(in_units.shape[:2], dtype=np.uint16)
+    twice = np.zeros_like(once)
+    for position in range(9):
+        column = in_units[:, :, position]
+        twice |= once & column
+        once |= column
+    singles = once & ~twice
+    hidden = masks & (singles[:, CELL_UNITS[:, 0]] | singles[:, CELL_UNITS[:, 1]] | singles[:, CELL_UNITS[:, 2]])
+    masks = np.where(hidden != 0, hidden, masks)
+
+    contradiction = (
+        clash
+        | (once != bitmask.ALL).any(axis=1)
+        | (masks == 0).any(axis=1)
+        | (POPCOUNT[hidden] > 1).any(axis=1)
+    )
+    return masks, contradiction
+
+
+def propagate(cand):
+    # Repeats eliminate() on every puzzle that is still changing. Takes and
+    # returns the (N, 81, 9) candidate tensor plus a contradiction flag.
+    masks = pack(cand)
+    contradiction = np.zeros(len(masks), dtype=bool)
+    active = np.arange(len(masks))
+    while len(active):
+        before = masks[active]
+        after, failed = eliminate(before)
+        masks[active] = after
+        contradiction[active] |= failed
+        changed = (after != before).any(axis=1)
+        active = active[changed & ~failed]
+    return unpack(masks), contradiction
+
+
+def to_grids(cand):
+    single = cand.sum(axis=2) == 1
+    return np.where(single, cand.argmax(axis=2) + 1, 0).astype(np.uint8)
+
+
+def solve_array(grids, chunk_size=4096):
+    # Solves an (N, 81) or (N, 9, 9) batch. Singles are applied to the whole
+    # chunk with array operations; only puzzles they leave open go through the
+    # scalar bitmask search. Returns (solutions (N, 81) uint8, solved (N,) bool).
+    grids = np.asarray(grids, dtype=np.uint8).reshape(-1, 81)
+    solutions = np.zeros_like(grids)
+    solved = np.zeros(len(grids), dtype=bool)
+
+    for start in range(0, len(grids), chunk_size):
+        cand, contradiction = propagate(to_candidates(grids[start:start + chunk_size]))
+        chunk = to_grids(cand)
+        complete = (chunk > 0).all(axis=1) & ~contradiction
+        solutions[start:start + len(chunk)] = chunk
+        solved[start:start + len(chunk)] = complete
+
+        for offset in np.flatnonzero(~complete & ~contradiction):
+            puzzle = chunk[offset].reshape(9, 9).tolist()
+            if bitmask.solve_sudoku(puzzle):
+                solutions[start + offset] = np.array(puzzle, dtype=np.uint8).ravel()
+                solved[start + offset] = True
+
+    return solutions, solved
+
+
+def solve_many(puzzles, chunk_size=4096):
+    # List-of-lists convenience wrapper: returns one solved 9x9 grid or None per puzzle.
+    if not puzzles:
+        return []
+    solutions, solved = solve_array(puzzles, chunk_size)
+    return [
+        solution.reshape(9, 9).tolist() if ok else None
+        for solution, ok in zip(solutions, solved)
+    ]
+
+
+def load_csv(path, limit=None):
+    # Reads the 'puzzle,solution' CSV used to train misc/cnn.py.
+    puzzles, expected = [], []
+    with open(path) as f:
+        next(f)
+        for line in f:
+            fields = line.strip().split(',')
+            puzzles.append(np.frombuffer(fields[0].encode(), dtype=np.uint8) - 48)
+            if len(fields) > 1:
+                expected.append(np.frombuffer(fields[1].encode(), dtype=np.uint8) - 48)
+            if limit and len(puzzles) >= limit:
+                break
+    return np.array(puzzles), (np.array(expected) if expected else None)
+
+
+if __name__ == '__main__':
+    puzzles, expected = load_csv(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else None)
+
+    start = time.perf_counter()
+    solutions, solved = solve_array(puzzles)
+    elapsed = time.perf_counter() - start
+
+    print(f"Solved {solved.sum()}/{len(puzzles)} puzzles in {elapsed:.2f}s ({len(puzzles) / elapsed:.0f} puzzles/s)")
+    if expected is not None:
+        print(f"Matching the reference solution: {(solutions == expected).all(axis=1).sum()}")
@@ -37,37 +37,128 @@ const checkPythonVersion = () => {
   });
 };
 
-const createWindow = () => {
-  ipcMain.on("solve", (e, args) => {
-    checkPythonVersion()
-      .then((python) => {
-        const pyProcess = spawn(python, [
-          path.join(
-            app.getAppPath(),
-            "..",
-            "app.asar.unpacked",
-            "main",
-            "services",
-            "solver.py",
-          ),
-        ]);
-        pyProcess.stdin.write(JSON.stringify(args));
-        pyProcess.stdin.end();
-
-        pyProcess.stdout.on("data", (data) => {
-          if (data.toString().includes("unsolvable")) {
-            e.reply("error", "unsolvable");
-            return;
+let solverDaemon = null;
+
+const startSolverDaemon = () => {
+  const daemon = {
+    nextId: 0,
+    pending: new Map(),
+    closed: null,
+    ready: checkPythonVersion().then((python) => {
+      const pyProcess = spawn(python, [
+        path.join(
+          app.getAppPath(),
+          "..",
+          "app.asar.unpacked",
+          "main",
+          "services",
+          "solver.py",
+        ),
+        "--serve",
+      ]);
+      let buffered = "";
+
+      pyProcess.stdout.on("data", (data) => {
+        buffered += data.toString();
+        let newline;
+        while ((newline = buffered.indexOf("\n")) !== -1) {
+          const line = buffered.slice(0, newline);
+          buffered = buffered.slice(newline + 1);
+          if (!line.trim()) continue;
+          let response;
+          try {
+            response = JSON.parse(line);
+          } catch (err) {
+            console.error(`Ignoring non-JSON solver output: ${line}`);
+            continue;
           }
-          e.reply("solved", JSON.parse(data.toString()));
-        });
+          const request = daemon.pending.get(response.id);
+          if (!request) continue;
+          daemon.pending.delete(response.id);
+          request(response);
+        }
+      });
 
-        pyProcess.stderr.on("data", (data) => {
-          console.error(`stderr: ${data}`);
-          e.reply("error", data.toString());
-        });
+      pyProcess.stderr.on("data", (data) => {
+        console.error(`stderr: ${data}`);
+      });
+
+      const fail = (code, message) => {
+        // Fail whatever was in flight; the next solve starts a fresh daemon.
+        daemon.closed = { code, message };
+        if (solverDaemon === daemon) solverDaemon = null;
+        daemon.pending.forEach((request, id) =>
+          request({ id, error: { code, message } }),
+        );
+        daemon.pending.clear();
+      };
+
+      pyProcess.on("exit", () => fail("exited", "Solver exited."));
+
+      // A failed spawn, or a write to a daemon that just died (EPIPE), would
+      // otherwise be an unhandled 'error' event in the main process.
+      pyProcess.on("error", (err) => {
+        console.error(`Solver process error: ${err.message}`);
+        fail("exited", "Solver could not be started.");
+      });
+      pyProcess.stdin.on("error", (err) => {
+        console.error(`Solver stdin error: ${err.message}`);
+        fail("exited", "Solver exited.");
+      });
+
+      return pyProcess;
+    }),
+  };
+  daemon.ready.catch(() => {
+    if (solverDaemon === daemon) solverDaemon = null;
+  });
+  return daemon;
+};
+
+const solve = (puzzle) => {
+  if (!solverDaemon) solverDaemon = startSolverDaemon();
+  const daemon = solverDaemon;
+  return daemon.ready.then(
+    (pyProcess) =>
+      new Promise((resolve) => {
+        const id = ++daemon.nextId;
+        if (daemon.closed) {
+          resolve({ id, error: daemon.closed });
+          return;
+        }
+        daemon.pending.set(id, resolve);
+        pyProcess.stdin.write(JSON.stringify({ id, puzzle }) + "\n");
+      }),
+  );
+};
+
+const cancelSolves = () => {
+  if (!solverDaemon) return;
+  const daemon = solverDaemon;
+  daemon.ready
+    .then((pyProcess) => {
+      if (daemon.closed) return;
+      daemon.pending.forEach((request, id) =>
+        pyProcess.stdin.write(JSON.stringify({ id, cancel: true }) + "\n"),
+      );
+    })
+    .catch(() => {});
+};
+
+const createWindow = () => {
+  ipcMain.on("solve", (e, args) => {
+    solve(args)
+      .then((response) => {
+        if (response.error) {
+          e.reply("error", response.error.code);
+          return;
+        }
+        e.reply("solved", response.solution);
       })
-      .catch((e) => e.reply("error", e.message));
+      .catch((error) => e.reply("error", error.message));
+  });
+  ipcMain.on("cancelSolve", () => {
+    cancelSolves();
   });
   ipcMain.on("openExternal", (e, args) => {
     shell.openExternal(args);
@@ -97,6 +188,12 @@ app.on("ready", () => {
   createWindow();
 });
 
+app.on("will-quit", () => {
+  if (solverDaemon) {
+    solverDaemon.ready.then((pyProcess) => pyProcess.kill()).catch(() => {});
+  }
+});
+
 app.on("window-all-closed", () => {
   if (process.platform !== "darwin") {
     app.quit();
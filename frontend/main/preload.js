@@ -8,6 +8,7 @@ contextBridge.exposeInMainWorld("electronAPI", {
     ipcRenderer.send(channel, args);
   },
   sendSudoku: (puzzle) => ipcRenderer.send("solve", puzzle),
+  cancelSudoku: () => ipcRenderer.send("cancelSolve"),
   addListener: (channel, callback) => {
     ipcRenderer.on(channel, callback);
     return () => ipcRenderer.removeListener(channel, callback);
@@ -1,55 +1,258 @@
 import json
+import queue
 import sys
+import threading
+import time
 
-def find_empty_location(arr, l):
+ALL = 0x1FF
+
+DIGIT_OF = {1 << d: d + 1 for d in range(9)}
+POPCOUNT = [bin(m).count('1') for m in range(ALL + 1)]
+
+ROWS = [tuple(row * 9 + col for col in range(9)) for row in range(9)]
+COLS = [tuple(row * 9 + col for row in range(9)) for col in range(9)]
+BOXES = [
+    tuple((box_row + row) * 9 + box_col + col for row in range(3) for col in range(3))
+    for box_row in range(0, 9, 3)
+    for box_col in range(0, 9, 3)
+]
+UNITS = ROWS + COLS + BOXES
+
+CELL_UNITS = [tuple(unit for unit in UNITS if cell in unit) for cell in range(81)]
+PEERS = [tuple(sorted({peer for unit in CELL_UNITS[cell] for peer in unit} - {cell})) for cell in range(81)]
+
+
+def propagate(cand, queue):
+    # Naked singles: every cell in the queue is fixed, strike its digit from its peers.
+    while queue:
+        cell = queue.pop()
+        bit = cand[cell]
+        for peer in PEERS[cell]:
+            mask = cand[peer]
+            if mask & bit:
+                mask ^= bit
+                if not mask:
+                    return False
+                cand[peer] = mask
+                if not mask & (mask - 1):
+                    queue.append(peer)
+    return True
+
+
+def hidden_singles(cand, queue):
+    # A digit that fits in only one cell of a unit must go there.
+    for unit in UNITS:
+        once = twice = 0
+        for cell in unit:
+            mask = cand[cell]
+            twice |= once & mask
+            once |= mask
+        if once != ALL:
+            return False
+        singles = once & ~twice
+        if not singles:
+            continue
+        for cell in unit:
+            mask = cand[cell] & singles
+            if mask and mask != cand[cell]:
+                if mask & (mask - 1):
+                    return False
+                cand[cell] = mask
+                queue.append(cell)
+    return True
+
+
+def reduce(cand, queue):
+    while True:
+        if not propagate(cand, queue):
+            return False
+        if not hidden_singles(cand, queue):
+            return False
+        if not queue:
+            return True
+
+
+def choose_cell(cand):
+    # Unfixed cell with the fewest candidates, or -1 when the grid is complete.
+    best, best_count = -1, 10
+    for cell in range(81):
+        count = POPCOUNT[cand[cell]]
+        if 1 < count < best_count:
+            best, best_count = cell, count
+            if count == 2:
+                break
+    return best
+
+
+def search(cand, queue, budget=None):
+    if budget is not None:
+        budget.tick()
+    if not reduce(cand, queue):
+        return None
+
+    best = choose_cell(cand)
+    if best < 0:
+        return cand  # Every cell is fixed
+
+    mask = cand[best]
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        trial = cand[:]
+        trial[best] = bit
+        result = search(trial, [best], budget)
+        if result is not None:
+            return result
+
+    return None
+
+
+def initial_candidates(arr):
+    cand = [ALL] * 81
+    queue = []
     for row in range(9):
         for col in range(9):
-            if arr[row][col] == 0:
-                l[0], l[1] = row, col
-                return True
-    return False
-
-def used_in_row(arr, row, num):
-    for col in range(9):
-        if arr[row][col] == num:
-            return True
-    return False
+            num = arr[row][col]
+            if num:
+                cell = row * 9 + col
+                cand[cell] = 1 << (num - 1)
+                queue.append(cell)
+    return cand, queue
+
+
+def solve_sudoku(arr, budget=None):
+    cand, queue = initial_candidates(arr)
+    result = search(cand, queue, budget)
+    if result is None:
+        return False
 
-def used_in_col(arr, col, num):
     for row in range(9):
-        if arr[row][col] == num:
-            return True
-    return False
+        for col in range(9):
+            arr[row][col] = DIGIT_OF[result[row * 9 + col]]
+    return True
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+class Budget:
+    # Deadline, node budget and cancellation flag for one solve. Engines call
+    # tick() once per search node; the clock and the flag are only looked at
+    # every CHECK_EVERY nodes to keep the hot loop cheap.
+    CHECK_EVERY = 64
 
-def used_in_box(arr, box_start_row, box_start_col, num):
-    for row in range(3):
-        for col in range(3):
-            if arr[row + box_start_row][col + box_start_col] == num:
-                return True
-    return False
+    def __init__(self, timeout_ms=None, max_nodes=None, cancelled=None):
+        self.deadline = time.monotonic() + timeout_ms / 1000 if timeout_ms else None
+        self.max_nodes = max_nodes
+        self.cancelled = cancelled
+        self.nodes = 0
 
-def is_safe(arr, row, col, num):
-    return not used_in_row(arr, row, num) and not used_in_col(arr, col, num) and not used_in_box(arr, row - row % 3, col - col % 3, num)
+    def tick(self):
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise BudgetExceeded("Node budget exceeded.")
+        if self.nodes % self.CHECK_EVERY:
+            return
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise BudgetExceeded("Time budget exceeded.")
+        if self.cancelled is not None and self.cancelled.is_set():
+            raise BudgetExceeded("Solve was cancelled.")
 
-def solve_sudoku(arr):
-    l = [0, 0]
-    if not find_empty_location(arr, l):
-        return True
 
-    row, col = l
+def validate_puzzle(puzzle):
+    if not isinstance(puzzle, list) or len(puzzle) != 9 or not all(isinstance(row, list) and len(row) == 9 for row in puzzle):
+        return "Puzzle must be a 9x9 grid."
+    for row in puzzle:
+        if not all(isinstance(num, int) and 0 <= num <= 9 for num in row):
+            return "Puzzle can only contain integers between 0 and 9."
+    return None
 
-    for num in range(1, 10):
-        if is_safe(arr, row, col, num):
-            arr[row][col] = num
 
-            if solve_sudoku(arr):
-                return True
+def handle(request_id, puzzle, timeout_ms, cancelled):
+    message = validate_puzzle(puzzle)
+    if message:
+        return {"id": request_id, "error": {"code": "invalid", "message": message}}
+    if timeout_ms is not None and (type(timeout_ms) is not int or timeout_ms <= 0):
+        return {"id": request_id, "error": {"code": "invalid", "message": "'timeout_ms' must be a positive integer."}}
+    try:
+        solved = solve_sudoku(puzzle, Budget(timeout_ms, cancelled=cancelled))
+    except BudgetExceeded as e:
+        code = "cancelled" if cancelled.is_set() else "budget_exceeded"
+        return {"id": request_id, "error": {"code": code, "message": str(e)}}
+    if not solved:
+        return {"id": request_id, "error": {"code": "unsolvable", "message": "Puzzle could not be solved."}}
+    return {"id": request_id, "solution": puzzle}
 
-            arr[row][col] = 0
 
-    return False
+def serve(stdin, stdout):
+    # One JSON request per line, one JSON response per line with the same id,
+    # until stdin closes. {"id": ..., "puzzle": [[...]], "timeout_ms": ...}
+    # queues a solve; {"id": ..., "cancel": true} stops that solve, whether it
+    # is still queued or already running on the worker thread.
+    write_lock = threading.Lock()
+    cancels = {}
+    jobs = queue.Queue()
+
+    def write(response):
+        with write_lock:
+            stdout.write(json.dumps(response) + "\n")
+            stdout.flush()
+
+    def work():
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            request_id, puzzle, timeout_ms, cancelled = job
+            if cancelled.is_set():
+                write({"id": request_id, "error": {"code": "cancelled", "message": "Solve was cancelled."}})
+            else:
+                try:
+                    response = handle(request_id, puzzle, timeout_ms, cancelled)
+                except Exception as e:
+                    # Keep the worker alive: every id gets a reply
+                    response = {"id": request_id, "error": {"code": "internal", "message": str(e)}}
+                write(response)
+            cancels.pop(request_id, None)
+
+    worker = threading.Thread(target=work, daemon=True)
+    worker.start()
+
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError:
+            request = None
+        if not isinstance(request, dict):
+            write({"id": None, "error": {"code": "bad_request", "message": "Request is not valid JSON."}})
+            continue
+
+        request_id = request.get("id")
+        if not isinstance(request_id, (str, int, float, type(None))):
+            write({"id": None, "error": {"code": "bad_request", "message": "'id' must be a string or a number."}})
+            continue
+        if request.get("cancel"):
+            cancelled = cancels.get(request_id)
+            if cancelled is not None:
+                cancelled.set()
+            continue
+
+        cancelled = cancels[request_id] = threading.Event()
+        jobs.put((request_id, request.get("puzzle"), request.get("timeout_ms"), cancelled))
+
+    jobs.put(None)
+    worker.join()
+
 
 if __name__ == "__main__":
+    if "--serve" in sys.argv[1:]:
+        serve(sys.stdin, sys.stdout)
+        sys.exit(0)
+
     arr = json.load(sys.stdin)
     if solve_sudoku(arr):
         print(json.dumps(arr))